@@ -0,0 +1,256 @@
+# archive.py - arsip histori lama: segmen gzip per bulan + ringkasan dan bloom filter SN (tanpa Qt)
+import base64
+import gzip
+import hashlib
+import json
+import math
+import os
+from collections import Counter, OrderedDict
+from datetime import date
+
+from history import matching_keys, parse_tanggal
+from masterdata import normalize
+
+INDEX_VERSION = 1
+CACHE_SEGMENTS = 4  # segmen yang sudah didekompresi disimpan di memori
+
+
+class BloomFilter:
+    """Bloom filter sederhana (double hashing blake2b); false positive ~fp, tidak ada false negative."""
+    def __init__(self, size_bits, hashes, bits=None):
+        self.size = size_bits
+        self.hashes = hashes
+        self.bits = bytearray(bits) if bits is not None else bytearray((size_bits + 7) // 8)
+
+    @classmethod
+    def for_capacity(cls, n, fp=0.01):
+        n = max(n, 1)
+        size = max(64, int(-n * math.log(fp) / math.log(2) ** 2))
+        return cls(size, max(1, round(size / n * math.log(2))))
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    def to_dict(self):
+        return {"size": self.size, "hashes": self.hashes, "bits": base64.b64encode(bytes(self.bits)).decode("ascii")}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["size"], data["hashes"], base64.b64decode(data["bits"]))
+
+
+def retention_cutoff(months, today=None):
+    """Tanggal awal bulan `months` bulan sebelum bulan ini ('YYYY-MM-01'); entri sebelum itu diarsipkan."""
+    today = today or date.today()
+    index = today.year * 12 + today.month - 1 - months
+    return f"{index // 12:04d}-{index % 12 + 1:02d}-01"
+
+
+def summarize(coll, entries):
+    """Ringkasan satu segmen: jumlah entri, total per item (qty), per tim, per divisi."""
+    summary = {"count": len(entries), "tim": Counter(), "divisi": Counter()}
+    if coll != "ont":
+        summary["items"] = Counter()
+    for entry in entries:
+        summary["tim"][entry.get("tim", "")] += 1
+        summary["divisi"][entry.get("divisi", "")] += 1
+        if coll != "ont":
+            summary["items"][entry.get("deskripsi", "")] += int(entry.get("qty", 0) or 0)
+    summary["first"] = min(e["tanggal"] for e in entries)
+    summary["last"] = max(e["tanggal"] for e in entries)
+    return {k: dict(v) if isinstance(v, Counter) else v for k, v in summary.items()}
+
+
+class Archive:
+    """Segmen arsip per (koleksi, bulan) di `directory`, dengan index ringkasan di index.json.
+
+    Ringkasan dan bloom filter SN selalu di memori; isi segmen hanya didekompresi saat
+    benar-benar dibutuhkan (tampilkan entri arsip atau konfirmasi SN yang lolos bloom).
+    """
+    def __init__(self, directory):
+        self.directory = directory
+        self.index_path = os.path.join(directory, "index.json")
+        self.segments = {}
+        self._blooms = {}
+        self._cache = OrderedDict()
+        self._sn_sets = {}
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == INDEX_VERSION:
+                self.segments = data["segments"]
+        except (OSError, ValueError, KeyError):
+            pass
+        for key, seg in self.segments.items():
+            if "bloom" in seg:
+                self._blooms[key] = BloomFilter.from_dict(seg["bloom"])
+
+    def __len__(self):
+        return sum(seg["count"] for seg in self.segments.values())
+
+    @staticmethod
+    def key(coll, month):
+        return f"{coll}/{month}"
+
+    def segment_path(self, coll, month):
+        return os.path.join(self.directory, f"{coll}-{month}.json.gz")
+
+    def months(self, coll, date_from=None, date_to=None):
+        """Bulan-bulan arsip `coll` yang beririsan dengan rentang (int yyyymmddHHMMSS, seperti HistoryStore)."""
+        lo = str(date_from)[:6] if date_from else ""
+        hi = str(date_to)[:6] if date_to else "999999"
+        result = []
+        for seg in self.segments.values():
+            if seg["coll"] == coll and lo <= seg["month"].replace("-", "") <= hi:
+                result.append(seg)
+        return sorted(result, key=lambda seg: seg["month"])
+
+    @staticmethod
+    def segment_count(seg, tim=None, divisi=None, tim_key=normalize, divisi_key=normalize):
+        """Jumlah entri satu segmen yang cocok dengan filter tim/divisi (dicocokkan seperti
+        HistoryStore), dari ringkasan per tim/divisi. Ringkasan hanya per kolom, jadi dengan
+        kedua filter sekaligus hasilnya batas atas."""
+        n = seg["count"]
+        for field, value, key_fn in (("tim", tim, tim_key), ("divisi", divisi, divisi_key)):
+            if not value:
+                continue
+            counts = Counter()
+            for name, c in seg.get(field, {}).items():
+                counts[key_fn(name)] += c
+            n = min(n, sum(counts[k] for k in matching_keys(counts, key_fn(value))))
+        return n
+
+    def count(self, coll, date_from=None, date_to=None, tim=None, divisi=None, tim_key=normalize, divisi_key=normalize):
+        # dari ringkasan saja; bulan di tepi rentang dihitung penuh (batas atas)
+        return sum(self.segment_count(seg, tim, divisi, tim_key, divisi_key)
+                   for seg in self.months(coll, date_from, date_to))
+
+    def read_segment(self, coll, month):
+        """Isi satu segmen; OSError/ValueError/EOFError diteruskan jika file hilang atau rusak."""
+        key = self.key(coll, month)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        with open(self.segment_path(coll, month), "rb") as f:
+            entries = json.loads(gzip.decompress(f.read()))
+        self._cache[key] = entries
+        if len(self._cache) > CACHE_SEGMENTS:
+            self._cache.popitem(last=False)
+        return entries
+
+    def load(self, coll, month):
+        # untuk tampilan saja: segmen yang tidak terbaca dianggap kosong (dan tidak di-cache)
+        try:
+            return self.read_segment(coll, month)
+        except (OSError, ValueError, EOFError):
+            return []
+
+    def entries(self, coll, date_from=None, date_to=None):
+        """Entri arsip di rentang tanggal; hanya segmen bulan yang beririsan yang didekompresi."""
+        result = []
+        for seg in self.months(coll, date_from, date_to):
+            for entry in self.load(coll, seg["month"]):
+                ts = parse_tanggal(entry.get("tanggal", ""))
+                if (date_from is None or ts >= date_from) and (date_to is None or ts <= date_to):
+                    result.append(entry)
+        return result
+
+    def has_sn(self, sn):
+        """Apakah SN pernah tercatat di arsip ONT; segmen hanya dibuka jika bloom filter bilang 'mungkin'."""
+        for key, bloom in self._blooms.items():
+            if sn not in bloom:
+                continue
+            sns = self._sn_sets.get(key)
+            if sns is None:
+                seg = self.segments[key]
+                sns = self._sn_sets[key] = {e.get("sn", "") for e in self.load(seg["coll"], seg["month"])}
+            if sn in sns:
+                return True
+        return False
+
+    def _write_segment(self, coll, month, entries):
+        path = self.segment_path(coll, month)
+        tmp = path + ".tmp"
+        # serialisasi sekali lalu kompres sekaligus; json.dump per potong ke gzip jauh lebih lambat
+        data = gzip.compress(json.dumps(entries, ensure_ascii=False).encode("utf-8"), compresslevel=6)
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _write_index(self, segments):
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": INDEX_VERSION, "segments": segments}, f, ensure_ascii=False)
+        os.replace(tmp, self.index_path)
+
+    def archive(self, collections, cutoff):
+        """Pindahkan entri dengan tanggal < cutoff ('YYYY-MM-DD') dari tiap list ke segmen arsip.
+
+        collections: dict koleksi -> list (diubah in-place). Segmen dan index ditulis lebih
+        dulu; jika proses terhenti sebelum histori disimpan, entri yang sama tidak dobel
+        karena penggabungan segmen memakai id entri. Kembalikan dict koleksi -> jumlah dipindah.
+        Segmen lama yang tidak terbaca atau gagal ditulis menghasilkan exception sebelum list
+        diubah, jadi entri tetap di histori aktif dan isi arsip lama tidak tertimpa.
+        """
+        plans = []
+        for coll, entries in collections.items():
+            by_month = {}
+            keep = []
+            for entry in entries:
+                tanggal = entry.get("tanggal", "")
+                if parse_tanggal(tanggal) and tanggal[:10] < cutoff:
+                    by_month.setdefault(tanggal[:7], []).append(entry)
+                else:
+                    keep.append(entry)
+            if not by_month:
+                continue
+            merged_by_month = {}
+            for month, new_entries in by_month.items():
+                old = self.read_segment(coll, month) if self.key(coll, month) in self.segments else []
+                seen = {e.get("id") for e in old if e.get("id")}
+                merged = old + [e for e in new_entries if not e.get("id") or e["id"] not in seen]
+                merged.sort(key=lambda e: e.get("tanggal", ""))
+                merged_by_month[month] = merged
+            plans.append((coll, entries, keep, merged_by_month))
+        if not plans:
+            return {}
+        # semua segmen dibaca dulu, baru ditulis; list histori baru diubah sesudah semuanya tertulis
+        os.makedirs(self.directory, exist_ok=True)
+        for coll, _, _, merged_by_month in plans:
+            for month, merged in merged_by_month.items():
+                self._write_segment(coll, month, merged)
+        segments = dict(self.segments)
+        blooms = {}
+        for coll, _, _, merged_by_month in plans:
+            for month, merged in merged_by_month.items():
+                key = self.key(coll, month)
+                seg = {"coll": coll, "month": month, "file": os.path.basename(self.segment_path(coll, month))}
+                seg.update(summarize(coll, merged))
+                if coll == "ont":
+                    bloom = blooms[key] = BloomFilter.for_capacity(len(merged))
+                    for e in merged:
+                        bloom.add(e.get("sn", ""))
+                    seg["bloom"] = bloom.to_dict()
+                segments[key] = seg
+        self._write_index(segments)
+        self.segments = segments
+        self._blooms.update(blooms)
+        moved = {}
+        for coll, entries, keep, merged_by_month in plans:
+            for month in merged_by_month:
+                key = self.key(coll, month)
+                self._sn_sets.pop(key, None)
+                self._cache.pop(key, None)
+            moved[coll] = len(entries) - len(keep)
+            entries[:] = keep
+        return moved
@@ -0,0 +1,127 @@
+# datagen.py - generator data sintetis untuk benchmark Material Tracker
+import argparse
+import csv
+import json
+import os
+import random
+from datetime import datetime, timedelta
+
+ITEMS = [f"Kabel Drop {i}C" for i in range(1, 9)] + [f"Aksesori {i:03d}" for i in range(120)]
+TEAMS = [f"Tim {i:02d}" for i in range(40)]
+DIVISI = ["IKR", "Maintenance", "Aktivasi", "Gudang"]
+
+
+def _timestamps(n, rng, start=datetime(2023, 1, 1), span_days=700):
+    # timestamp naik (seperti histori asli yang selalu di-append)
+    step = span_days * 86400 / max(n, 1)
+    t = start
+    for _ in range(n):
+        t += timedelta(seconds=rng.uniform(0, 2 * step))
+        yield t
+
+
+def gen_histori_mat(n, seed=1):
+    rng = random.Random(seed)
+    return [{
+        "tanggal": t.strftime("%Y-%m-%d %H:%M:%S"),
+        "deskripsi": rng.choice(ITEMS),
+        "qty": rng.randint(1, 50),
+        "tim": rng.choice(TEAMS),
+        "divisi": rng.choice(DIVISI),
+    } for t in _timestamps(n, rng)]
+
+
+def gen_sn(i):
+    return f"ZTEG{i:08X}"
+
+
+def gen_histori_ont(n, seed=2):
+    rng = random.Random(seed)
+    return [{
+        "tanggal": t.strftime("%Y-%m-%d %H:%M:%S"),
+        "sn": gen_sn(i),
+        "tim": rng.choice(TEAMS),
+        "divisi": rng.choice(DIVISI),
+    } for i, t in enumerate(_timestamps(n, rng))]
+
+
+def gen_stock_entries(n, seed=3):
+    rng = random.Random(seed)
+    return [{
+        "tanggal": t.strftime("%Y-%m-%d %H:%M:%S"),
+        "deskripsi": rng.choice(ITEMS),
+        "qty": rng.randint(50, 500),
+    } for t in _timestamps(n, rng)]
+
+
+def write_report_csv(path, n, report_type="myrepublic", seed=4):
+    """Tulis CSV laporan Telegram; separuh SN sama dengan gen_histori_ont supaya status Terpakai terisi."""
+    rng = random.Random(seed)
+    if report_type == "asianet":
+        header = ["Tanggal", "ID Pelanggan", "Nama Pelanggan", "SN", "Nama Teknisi"]
+    else:
+        header = ["Timestamp", "Subscription ID", "Customer", "SN", "Team"]
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        for i, t in enumerate(_timestamps(n, rng)):
+            sn = gen_sn(i * 2) if i % 2 == 0 else f"RPT{i:08d}"
+            writer.writerow([
+                t.strftime("%Y-%m-%d %H:%M:%S"),
+                f"SUB{i:07d}",
+                f"Pelanggan {rng.randint(1, 10 ** 6)}",
+                sn,
+                rng.choice(TEAMS),
+            ])
+
+
+def write_import_kabel_csv(path, n, seed=5):
+    rng = random.Random(seed)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Deskripsi", "Qty", "Tim"])
+        for _ in range(n):
+            writer.writerow([rng.choice(ITEMS), rng.randint(1, 50), rng.choice(TEAMS)])
+
+
+def write_import_ont_csv(path, n, offset=10 ** 7):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["SN", "Tim", "Divisi"])
+        for i in range(n):
+            writer.writerow([gen_sn(offset + i), TEAMS[i % len(TEAMS)], DIVISI[i % len(DIVISI)]])
+
+
+def write_data_dir(data_dir, n):
+    """Isi folder data (format ~/.material_tracker) dengan n baris histori."""
+    os.makedirs(data_dir, exist_ok=True)
+    files = {
+        "divisi.json": DIVISI,
+        "tim.json": TEAMS,
+        "material.json": ITEMS[:8],
+        "aksesori.json": ITEMS[8:],
+        "histori_kabel_aksesori.json": gen_histori_mat(n),
+        "histori_ont.json": gen_histori_ont(n),
+        "stock_entries.json": gen_stock_entries(max(n // 100, 1)),
+    }
+    for filename, data in files.items():
+        with open(os.path.join(data_dir, filename), "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Buat HOME sintetis (.material_tracker + Reports) untuk uji manual")
+    parser.add_argument("home", help="folder tujuan, jalankan aplikasi dengan HOME=<folder>")
+    parser.add_argument("--rows", type=int, default=10000)
+    args = parser.parse_args()
+    write_data_dir(os.path.join(args.home, ".material_tracker"), args.rows)
+    reports = os.path.join(args.home, "Reports")
+    os.makedirs(reports, exist_ok=True)
+    write_report_csv(os.path.join(reports, "wifi_reports.csv"), args.rows)
+    write_report_csv(os.path.join(reports, "asianet_reports.csv"), args.rows // 2, "asianet")
+    write_report_csv(os.path.join(reports, "Oxy_Reports.csv"), args.rows // 4)
+    print(f"Data sintetis {args.rows} baris ditulis ke {args.home}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# run_benchmarks.py - ukur jalur-jalur berat Material Tracker dengan data sintetis
+#
+#   python benchmarks/run_benchmarks.py --sizes 1000,10000
+#   python benchmarks/run_benchmarks.py --sizes 1000,100000,1000000 --skip-gui
+#   python benchmarks/run_benchmarks.py --save-baseline
+#
+# Semua data ditulis ke HOME sementara, folder data asli tidak disentuh.
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.dirname(HERE))
+
+import datagen  # noqa: E402
+
+DEFAULT_OUTPUT = os.path.join(HERE, "latest.json")
+DEFAULT_BASELINE = os.path.join(HERE, "baseline.json")
+
+
+def timeit(fn, repeat, setup=None):
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return {"min": min(samples), "median": statistics.median(samples), "repeat": repeat}
+
+
+def prepare_home():
+    # DATA_DIR dihitung saat main.py diimpor, jadi HOME harus diganti lebih dulu
+    home = tempfile.mkdtemp(prefix="mt_bench_")
+    os.environ["HOME"] = home
+    os.environ["USERPROFILE"] = home
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    os.makedirs(os.path.join(home, "Reports"))
+    return home
+
+
+def patch_dialogs(main, state):
+    # dialog file/pesan diganti supaya import/ekspor bisa diukur tanpa interaksi
+    class FileDialog:
+        @staticmethod
+        def getOpenFileName(*args, **kwargs):
+            return state["open"], ""
+
+        @staticmethod
+        def getSaveFileName(*args, **kwargs):
+            return state["save"], ""
+
+    class MessageBox:
+        @staticmethod
+        def information(*args, **kwargs):
+            return None
+
+        @staticmethod
+        def warning(*args, **kwargs):
+            state.setdefault("warnings", []).append(args[2] if len(args) > 2 else "")
+            return None
+
+    main.QFileDialog = FileDialog
+    main.QMessageBox = MessageBox
+
+
+def set_history(main, mat, ont, stock):
+    main.HISTORI_MAT[:] = mat
+    main.HISTORI_ONT[:] = ont
+    main.STOCK_ENTRIES[:] = stock
+    # journal dari ukuran sebelumnya akan di-replay ke histori baru; mulai dari kosong
+    for name in ("journal.jsonl", "journal_state.json"):
+        path = main.data_path(name)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def run(sizes, repeat, skip_gui):
+    home = prepare_home()
+    import main
+    main.init_data()
+    from PySide6.QtWidgets import QApplication
+
+    app = QApplication.instance() or QApplication([])
+    main.MATERIAL.set_items(datagen.ITEMS[:8])
+    main.AKSESORI.set_items(datagen.ITEMS[8:])
+    main.TIM.set_items(datagen.TEAMS)
+    main.DIVISI.set_items(datagen.DIVISI)
+    state = {}
+    patch_dialogs(main, state)
+    reports_dir = os.path.join(home, "Reports")
+    work = os.path.join(home, "work")
+    os.makedirs(work)
+    results = {}
+
+    def record(name, n, stats):
+        key = f"{name}@{n}"
+        results[key] = stats
+        print(f"  {key:<32} min {stats['min'] * 1000:10.2f} ms   median {stats['median'] * 1000:10.2f} ms", flush=True)
+
+    for n in sizes:
+        print(f"== {n} baris", flush=True)
+        mat = datagen.gen_histori_mat(n)
+        ont = datagen.gen_histori_ont(n)
+        stock = datagen.gen_stock_entries(max(n // 100, 1))
+        set_history(main, mat, ont, stock)
+
+        record("save_json", n, timeit(lambda: main.save_json("histori_kabel_aksesori.json", main.HISTORI_MAT), repeat))
+        record("load_json", n, timeit(lambda: main.load_json("histori_kabel_aksesori.json", []), repeat))
+
+        report_csv = os.path.join(reports_dir, "wifi_reports.csv")
+        datagen.write_report_csv(report_csv, n)
+        index_dir = main.REPORT_INDEX_DIR
+        jobs = [(report_csv, "myrepublic")]
+        record("load_reports_cold", n, timeit(
+            lambda: main.load_report_files(jobs, index_dir), repeat,
+            setup=lambda: shutil.rmtree(index_dir, ignore_errors=True)))
+        record("load_reports_warm", n, timeit(lambda: main.load_report_files(jobs, index_dir), repeat))
+
+        kabel_csv = os.path.join(work, "import_kabel.csv")
+        ont_csv = os.path.join(work, "import_ont.csv")
+        datagen.write_import_kabel_csv(kabel_csv, n)
+        datagen.write_import_ont_csv(ont_csv, n)
+
+        if skip_gui:
+            continue
+
+        mw = main.MaterialTracker()
+        resume = mw.resume
+        tab = mw.laporan_tabs[0]
+        tab.date_from.setDate(main.QDate(2000, 1, 1))
+
+        record("reload_all", n, timeit(mw.reload_all, repeat))
+        record("show_stock", n, timeit(resume.show_stock, repeat))
+        record("show_kabel", n, timeit(resume.show_kabel, repeat))
+        record("show_ont", n, timeit(resume.show_ont, repeat))
+        record("filter_table", n, timeit(tab.filter_table, repeat))
+
+        def search_filter():
+            tab.search_field.setText("pelanggan 12")
+            tab.search_field.setText("")
+        record("filter_table_keyword", n, timeit(search_filter, repeat))
+
+        def reset():
+            set_history(main, mat, ont, stock)
+        state["open"] = kabel_csv
+        record("import_kabel_csv", n, timeit(resume.import_kabel_csv, repeat, setup=reset))
+        state["open"] = ont_csv
+        record("import_ont_csv_resume", n, timeit(resume.import_ont_csv_from_resume, repeat, setup=reset))
+        record("import_ont_csv_form", n, timeit(mw.form_pengambilan.import_ont_csv, repeat, setup=reset))
+        reset()
+
+        state["save"] = os.path.join(work, "export.csv")
+        record("download_kabel", n, timeit(resume.download_kabel, repeat))
+        record("download_ont", n, timeit(resume.download_ont, repeat))
+        record("export_report_csv", n, timeit(tab.export_csv, repeat))
+
+        mw.deleteLater()
+        app.processEvents()
+
+    if state.get("warnings"):
+        print("Peringatan selama benchmark:", *state["warnings"], sep="\n  ")
+    # tulisan latar yang tertunda (master, pengaturan) harus selesai sebelum folder dihapus
+    main.PERSIST.close()
+    shutil.rmtree(home, ignore_errors=True)
+    return results
+
+
+def compare(results, baseline):
+    print(f"\n{'benchmark':<32} {'baseline ms':>12} {'sekarang ms':>12} {'rasio':>8}")
+    for key, stats in results.items():
+        base = baseline.get("results", {}).get(key)
+        if not base:
+            continue
+        ratio = stats["median"] / base["median"] if base["median"] else float("inf")
+        flag = "  <-- lebih lambat" if ratio > 1.1 else ("  lebih cepat" if ratio < 0.9 else "")
+        print(f"{key:<32} {base['median'] * 1000:12.2f} {stats['median'] * 1000:12.2f} {ratio:8.2f}{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark jalur berat Material Tracker")
+    parser.add_argument("--sizes", default="1000,10000", help="jumlah baris, dipisah koma (mis. 1000,100000,1000000)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--skip-gui", action="store_true", help="lewati benchmark yang butuh widget Qt (untuk ukuran sangat besar)")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="simpan hasil juga sebagai baseline")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    results = run(sizes, args.repeat, args.skip_gui)
+    report = {
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "sizes": sizes,
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nHasil disimpan ke {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline disimpan ke {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
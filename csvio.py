@@ -0,0 +1,125 @@
+# csvio.py - deteksi encoding/BOM/delimiter file CSV (sekali per file) dan pembacaan baris dengan ringkasan error
+import codecs
+import csv
+import os
+from collections import namedtuple
+
+SAMPLE_BYTES = 64 * 1024
+DELIMITERS = (",", ";", "\t", "|")
+MAX_ERROR_SAMPLES = 20
+
+CsvFormat = namedtuple("CsvFormat", "encoding bom delimiter")
+CsvFormat.__doc__ = "Hasil deteksi: encoding untuk decode, panjang BOM (byte) dan delimiter."
+
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+_CACHE = {}
+
+
+def detect_encoding(sample):
+    """(encoding, panjang_bom) dari potongan awal file."""
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom):
+            return encoding, len(bom)
+    try:
+        # final=False: karakter multibyte yang terpotong di ujung sampel tidak dianggap error
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return "utf-8", 0
+    except UnicodeDecodeError:
+        pass
+    try:
+        sample.decode("cp1252")  # ekspor Excel Windows
+        return "cp1252", 0
+    except UnicodeDecodeError:
+        return "latin-1", 0
+
+
+def detect_delimiter(text):
+    """Delimiter yang jumlah kolomnya paling konsisten di baris-baris awal (default koma)."""
+    lines = [line for line in text.splitlines()[:30] if line.strip()]
+    if len(lines) > 1:
+        lines = lines[:-1]  # baris terakhir sampel mungkin terpotong
+    best, best_score = ",", (0, 0)
+    for delimiter in DELIMITERS:
+        counts = [len(next(csv.reader([line], delimiter=delimiter))) for line in lines]
+        if not counts or counts[0] < 2:
+            continue
+        score = (sum(1 for c in counts if c == counts[0]), counts[0])
+        if score > best_score:
+            best, best_score = delimiter, score
+    return best
+
+
+def sniff(path):
+    """Deteksi format file CSV; hasil di-cache per (path, ukuran, mtime)."""
+    st = os.stat(path)
+    key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    fmt = _CACHE.get(key)
+    if fmt is None:
+        with open(path, "rb") as f:
+            sample = f.read(SAMPLE_BYTES)
+        encoding, bom = detect_encoding(sample)
+        text = sample.decode(encoding, errors="replace")  # codec -sig/utf-16 membuang BOM sendiri
+        fmt = _CACHE[key] = CsvFormat(encoding, bom, detect_delimiter(text))
+    return fmt
+
+
+def clean_header(names):
+    return [(name or "").replace("\ufeff", "").strip() for name in names]
+
+
+def check_row(values, width):
+    """Pesan error jika jumlah kolom tidak sesuai header (kolom kosong berlebih di ujung ditoleransi)."""
+    if len(values) > width and any(v.strip() for v in values[width:]):
+        return f"{len(values)} kolom, header {width} kolom (delimiter/tanda kutip tidak sesuai?)"
+    if len(values) < width:
+        return f"hanya {len(values)} dari {width} kolom"
+    return None
+
+
+class RowErrors:
+    """Kumpulan error per baris: jumlah total + beberapa contoh pertama untuk ringkasan."""
+    def __init__(self, samples=None, count=0):
+        self.samples = list(samples or [])
+        self.count = count or len(self.samples)
+
+    def __bool__(self):
+        return self.count > 0
+
+    def add(self, line, message):
+        self.count += 1
+        if len(self.samples) < MAX_ERROR_SAMPLES:
+            self.samples.append((line, message))
+
+    def summary(self, limit=5):
+        lines = [f"baris {line}: {message}" for line, message in self.samples[:limit]]
+        if self.count > limit:
+            lines.append(f"... dan {self.count - limit} baris lainnya")
+        return "\n".join(lines)
+
+
+def read_dicts(path, errors):
+    """Yield (nomor_baris, dict kolom) untuk tiap baris data memakai format hasil sniff().
+
+    Baris kosong dilewati; baris dengan jumlah kolom tidak sesuai dicatat di `errors`
+    (RowErrors) lalu dilewati, sehingga satu baris rusak tidak menggagalkan seluruh file.
+    """
+    fmt = sniff(path)
+    with open(path, newline="", encoding=fmt.encoding, errors="replace") as f:
+        reader = csv.reader(f, delimiter=fmt.delimiter)
+        header = next(reader, None)
+        if header is None:
+            return
+        fieldnames = clean_header(header)
+        width = len(fieldnames)
+        for values in reader:
+            if not any(v.strip() for v in values):
+                continue
+            problem = check_row(values, width)
+            if problem:
+                errors.add(reader.line_num, problem)
+                continue
+            yield reader.line_num, dict(zip(fieldnames, values))
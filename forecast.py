@@ -0,0 +1,136 @@
+# forecast.py - perkiraan habisnya stock dari laju pengambilan (EWMA, diperbarui per kejadian)
+import math
+from datetime import date, datetime
+from functools import lru_cache
+
+TAU_DAYS = 14.0  # konstanta waktu EWMA: pengambilan 2 minggu terakhir paling berpengaruh
+WARN_DAYS = 7.0  # peringatan jika stock diperkirakan habis dalam sekian hari
+
+
+@lru_cache(maxsize=4096)
+def _ordinal(day):
+    try:
+        return date(int(day[0:4]), int(day[5:7]), int(day[8:10])).toordinal()
+    except ValueError:
+        return None
+
+
+def event_day(tanggal):
+    """'YYYY-MM-DD HH:MM:SS' -> nomor hari (pecahan); None jika tanggal tidak valid."""
+    day = _ordinal((tanggal or "")[:10])
+    if day is None:
+        return None
+    t = tanggal[11:19]
+    if len(t) == 8 and t[0:2].isdigit() and t[3:5].isdigit() and t[6:8].isdigit():
+        return day + (int(t[0:2]) * 3600 + int(t[3:5]) * 60 + int(t[6:8])) / 86400
+    return day
+
+
+def now_day():
+    return event_day(datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+
+
+class ItemState:
+    __slots__ = ("name", "masuk", "diambil", "ref", "weighted")
+
+    def __init__(self, name):
+        self.name = name
+        self.masuk = 0
+        self.diambil = 0
+        self.ref = None     # hari referensi untuk `weighted`
+        self.weighted = 0.0  # S = sum qty * exp(-(ref - t) / tau)
+
+
+class Forecaster:
+    """Laju pengambilan per item sebagai EWMA waktu kontinu.
+
+    Setiap pengambilan (atau pembatalannya) mengubah S = sum q*exp(-(t_ref - t)/tau) dalam O(1);
+    laju harian = S(sekarang) / tau. key: fungsi nama -> kunci item (mis. MASTER.item_key).
+    """
+    def __init__(self, tau_days=TAU_DAYS, key=None):
+        self.tau = tau_days
+        self.key = key or (lambda name: name)
+        self.items = {}
+
+    def _item(self, name):
+        k = self.key(name)
+        item = self.items.get(k)
+        if item is None:
+            item = self.items[k] = ItemState(name)
+        return item
+
+    def add_withdrawal(self, name, qty, tanggal, sign=1):
+        item = self._item(name)
+        qty = int(qty or 0) * sign
+        item.diambil += qty
+        t = event_day(tanggal)
+        if t is None:
+            return
+        if item.ref is None:
+            item.ref, item.weighted = t, float(qty)
+        elif t >= item.ref:
+            item.weighted = item.weighted * math.exp(-(t - item.ref) / self.tau) + qty
+            item.ref = t
+        else:
+            # kejadian lama (import/sync/undo): kontribusinya diluruhkan ke hari referensi
+            item.weighted += qty * math.exp(-(item.ref - t) / self.tau)
+
+    def add_stock(self, name, qty, sign=1):
+        self._item(name).masuk += int(qty or 0) * sign
+
+    def add_totals(self, masuk=None, diambil=None):
+        # total dari ringkasan arsip: ikut sisa stock, laju dianggap sudah meluruh
+        for name, qty in (masuk or {}).items():
+            self._item(name).masuk += qty
+        for name, qty in (diambil or {}).items():
+            self._item(name).diambil += qty
+
+    def apply(self, coll, entries, sign=1):
+        """Observer CommandLog: entri ditambah (sign=1) atau dihapus (sign=-1) dari koleksi."""
+        if coll == "mat":
+            for e in entries:
+                self.add_withdrawal(e.get("deskripsi", ""), e.get("qty", 0), e.get("tanggal", ""), sign)
+        elif coll == "stock":
+            for e in entries:
+                self.add_stock(e.get("deskripsi", ""), e.get("qty", 0), sign)
+
+    def rate(self, item, day=None):
+        """Perkiraan pengambilan per hari."""
+        if item.ref is None:
+            return 0.0
+        day = now_day() if day is None else day
+        return max(item.weighted * math.exp(-max(day - item.ref, 0) / self.tau) / self.tau, 0.0)
+
+    def forecast(self, day=None, warn_days=WARN_DAYS):
+        """Daftar item yang punya stock masuk: sisa, laju/hari, perkiraan hari habis, status."""
+        day = now_day() if day is None else day
+        rows = []
+        for item in self.items.values():
+            if item.masuk <= 0:
+                continue
+            sisa = item.masuk - item.diambil
+            rate = self.rate(item, day)
+            days_left = sisa / rate if rate > 1e-9 else None
+            if sisa <= 0:
+                days_left = 0.0
+                status = "Habis"
+            elif days_left is not None and days_left <= warn_days:
+                status = "Menipis"
+            else:
+                status = "Aman"
+            rows.append({"item": item.name, "sisa": sisa, "laju": rate, "hari": days_left, "status": status})
+        order = {"Habis": 0, "Menipis": 1, "Aman": 2}
+        rows.sort(key=lambda r: (order[r["status"]], r["hari"] if r["hari"] is not None else math.inf, r["item"]))
+        return rows
+
+    def warnings(self, day=None, warn_days=WARN_DAYS):
+        return [r for r in self.forecast(day, warn_days) if r["status"] != "Aman"]
+
+
+def format_report(rows):
+    """Laporan teks untuk CLI (python main.py --forecast)."""
+    lines = [f"{'Item':<32} {'Sisa':>8} {'Ambil/hari':>11} {'Habis (hari)':>13}  Status"]
+    for r in rows:
+        hari = f"{r['hari']:.1f}" if r["hari"] is not None else "-"
+        lines.append(f"{r['item'][:32]:<32} {r['sisa']:>8} {r['laju']:>11.2f} {hari:>13}  {r['status']}")
+    return "\n".join(lines)
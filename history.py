@@ -0,0 +1,181 @@
+# history.py - index histori untuk tampilan berhalaman dan filter (tanpa Qt)
+from bisect import bisect_left, insort
+from heapq import merge
+
+from masterdata import normalize
+
+
+def parse_tanggal(tanggal):
+    """'YYYY-MM-DD HH:MM:SS' (atau tanggal saja) -> int yyyymmddHHMMSS yang bisa diurutkan; 0 jika gagal."""
+    t = tanggal or ""
+    digits = t[0:4] + t[5:7] + t[8:10] + t[11:13] + t[14:16] + t[17:19]
+    if len(digits) < 8 or not digits.isdigit():
+        return 0
+    return int(digits.ljust(14, "0"))
+
+
+class HistoryView:
+    """Hasil query atas HistoryStore: potongan [lo, hi) dari list kunci terurut + predikat tambahan."""
+    def __init__(self, store, keys, lo, hi, predicates=()):
+        self.store = store
+        self.keys = keys
+        self.lo = lo
+        self.hi = hi
+        self.predicates = [p for p in predicates if p is not None]
+
+    def __len__(self):
+        # batas atas; predikat tambahan bisa mengurangi jumlah sebenarnya
+        return self.hi - self.lo
+
+    def fetch(self, cursor=None, limit=200):
+        """Ambil maksimal `limit` nomor urut entri terbaru sebelum `cursor` (tanggal menurun).
+
+        Kembalikan (daftar_nomor_urut, cursor_berikutnya); cursor_berikutnya None jika habis.
+        """
+        keys, entries = self.keys, self.store.by_serial
+        pos = self.hi if cursor is None else bisect_left(keys, cursor, self.lo, self.hi)
+        result = []
+        while pos > self.lo and len(result) < limit:
+            pos -= 1
+            serial = keys[pos][1]
+            entry = entries[serial]
+            if all(p(entry) for p in self.predicates):
+                result.append(serial)
+        next_cursor = keys[pos] if pos > self.lo else None
+        return result, next_cursor
+
+
+def matching_keys(keys, key):
+    """Kunci yang cocok dengan kunci teks filter: kunci itu sendiri jika ada,
+    selain itu semua kunci yang mengandungnya (ketik sebagian nama)."""
+    if key in keys:
+        return [key]
+    return [k for k in keys if key in k]
+
+
+def _ident(entry):
+    return entry.get("id") or id(entry)
+
+
+def _discard(keys, key):
+    i = bisect_left(keys, key)
+    if i < len(keys) and keys[i] == key:
+        del keys[i]
+
+
+class HistoryStore:
+    """Index histori (list dict): kunci (timestamp, nomor_urut) terurut plus posting list per tim/divisi.
+
+    Nomor urut diberikan store ke tiap entri (bukan posisi di list), jadi entri bisa ditambah
+    atau dihapus satu per satu lewat apply() tanpa rebuild. Cursor adalah kunci baris terakhir
+    yang sudah diambil, sehingga halaman berikutnya tetap konsisten walaupun ada entri baru.
+    coll: nama koleksi command log yang diikuti store ini. tim_key/divisi_key: fungsi nama ->
+    kunci posting list (mis. TIM.key), default normalize (beda kapital/spasi diabaikan).
+    """
+    FIELDS = ("tim", "divisi")
+
+    def __init__(self, entries, coll=None, tim_key=None, divisi_key=None):
+        self.entries = entries
+        self.coll = coll
+        self.key_fns = {"tim": tim_key or normalize, "divisi": divisi_key or normalize}
+        self.rebuild()
+
+    def rebuild(self):
+        """Bangun ulang seluruh index dari self.entries (data atau daftar master berubah di luar command log)."""
+        self.by_serial = {}
+        self._serials = {}
+        self._next = 0
+        # histori umumnya sudah hampir urut (append kronologis), jadi sort ini murah
+        self._keys = sorted(self._register(e) for e in self.entries)
+        self._postings = {field: {} for field in self.FIELDS}
+        for key in self._keys:
+            entry = self.by_serial[key[1]]
+            for field in self.FIELDS:
+                self._posting(field, entry).append(key)
+
+    def _posting(self, field, entry):
+        return self._postings[field].setdefault(self.key_fns[field](entry.get(field, "")), [])
+
+    def _register(self, entry):
+        serial = self._next
+        self._next += 1
+        self.by_serial[serial] = entry
+        self._serials[_ident(entry)] = serial
+        return parse_tanggal(entry.get("tanggal", "")), serial
+
+    def add(self, entry):
+        if _ident(entry) in self._serials:
+            self.remove(entry)
+        key = self._register(entry)
+        insort(self._keys, key)
+        for field in self.FIELDS:
+            insort(self._posting(field, entry), key)
+
+    def remove(self, entry):
+        serial = self._serials.pop(_ident(entry), None)
+        if serial is None:
+            return
+        stored = self.by_serial.pop(serial)
+        key = (parse_tanggal(stored.get("tanggal", "")), serial)
+        _discard(self._keys, key)
+        for field in self.FIELDS:
+            _discard(self._posting(field, stored), key)
+
+    def apply(self, coll, entries, sign=1):
+        """Observer CommandLog: entri ditambah (sign=1) atau dihapus (sign=-1) dari koleksi."""
+        if coll != self.coll:
+            return
+        for entry in entries:
+            if sign > 0:
+                self.add(entry)
+            else:
+                self.remove(entry)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def matching_keys(self, field, value):
+        """Kunci posting list untuk teks filter tim/divisi (nama dikenal, alias atau sebagian nama)."""
+        return matching_keys(self._postings[field], self.key_fns[field](value))
+
+    def query(self, date_from=None, date_to=None, tim=None, divisi=None, predicate=None):
+        """View untuk rentang timestamp [date_from, date_to] (int yyyymmddHHMMSS), tim dan divisi.
+
+        Posting list terkecil (tim/divisi) dipakai sebagai basis lalu dipotong dengan bisect,
+        sehingga hanya entri yang cocok yang disentuh.
+        """
+        lo_key = (date_from, -1) if date_from is not None else None
+        hi_key = (date_to + 1, -1) if date_to is not None else None
+
+        def bounds(keys):
+            lo = bisect_left(keys, lo_key) if lo_key else 0
+            hi = bisect_left(keys, hi_key) if hi_key else len(keys)
+            return lo, max(lo, hi)
+
+        candidates = [(self._keys, None)]
+        matches = {}
+        for field, value in (("tim", tim), ("divisi", divisi)):
+            if not value:
+                continue
+            keys = matches[field] = self.matching_keys(field, value)
+            lists = [self._postings[field][k] for k in keys]
+            # beberapa posting list (pencarian sebagian) digabung tetap terurut
+            candidates.append((lists[0] if len(lists) == 1 else list(merge(*lists)), field))
+        best = None
+        for keys, field in candidates:
+            lo, hi = bounds(keys)
+            if best is None or hi - lo < best[2] - best[1]:
+                best = (keys, lo, hi, field)
+        keys, lo, hi, field = best
+        predicates = [predicate]
+        for other, allowed in matches.items():
+            if other != field:
+                predicates.append(self._field_predicate(other, set(allowed)))
+        return HistoryView(self, keys, lo, hi, predicates)
+
+    def _field_predicate(self, field, allowed):
+        key_fn = self.key_fns[field]
+        return lambda e: key_fn(e.get(field, "")) in allowed
+
+    def fetch(self, cursor=None, limit=200, predicate=None):
+        return self.query(predicate=predicate).fetch(cursor, limit)
@@ -0,0 +1,382 @@
+# journal.py - command log (undo/redo) berbasis delta, disimpan append-only di journal.jsonl
+import hashlib
+import json
+import os
+import uuid
+from collections import Counter, deque
+from datetime import datetime
+
+MAX_UNDO = 200
+SNAPSHOT_OPS = 100                # koleksi ditulis ke file json setiap sekian record journal
+COMPACT_BYTES = 4 * 1024 * 1024   # bagian journal yang sudah ter-snapshot dibuang jika sebesar ini
+
+
+def new_id():
+    return uuid.uuid4().hex
+
+
+LEGACY_FIELDS = ("tanggal", "sn", "deskripsi", "qty", "tim", "divisi")
+
+
+def legacy_id(coll, entry, occurrence=0):
+    """Id dari isi entri: entri lama yang sama (mis. disalin manual antar PC) dapat id yang sama
+    di setiap PC, jadi data awal sync tidak menduplikasinya. occurrence membedakan entri kembar."""
+    key = json.dumps([coll, occurrence] + [entry.get(f, "") for f in LEGACY_FIELDS], ensure_ascii=False)
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:32]
+
+
+def ensure_ids(coll, entries):
+    """Beri id ke entri lama yang belum punya; kembalikan True jika ada yang diubah."""
+    changed = False
+    seen = Counter()
+    for entry in entries:
+        if not entry.get("id"):
+            base = legacy_id(coll, entry)
+            entry["id"] = legacy_id(coll, entry, seen[base]) if seen[base] else base
+            seen[base] += 1
+            changed = True
+    return changed
+
+
+def add(coll, entries):
+    """Delta: append entri ke koleksi."""
+    return {"coll": coll, "action": "add", "entries": list(entries)}
+
+
+def remove(coll, index, entry):
+    """Delta: hapus satu entri (posisi index) dari koleksi."""
+    return {"coll": coll, "action": "remove", "index": index, "entry": entry}
+
+
+def inverse(changes):
+    """Delta kebalikan (berbasis id) dari daftar perubahan, dalam urutan terbalik."""
+    result = []
+    for change in reversed(changes):
+        if change["action"] == "add":
+            for entry in reversed(change["entries"]):
+                result.append(remove(change["coll"], -1, entry))
+        else:
+            result.append(add(change["coll"], [change["entry"]]))
+    return result
+
+
+class CommandLog:
+    """Mencatat setiap perubahan histori sebagai delta kecil dan menyediakan undo/redo.
+
+    collections: dict nama -> list (HISTORI_MAT, HISTORI_ONT, STOCK_ENTRIES);
+    save: fungsi(nama) untuk menulis satu koleksi ke file json; on_change dipanggil setiap
+    kali stack undo/redo berubah. observers: fungsi(koleksi, entri, tanda) yang dipanggil
+    untuk setiap entri yang masuk (+1) atau keluar (-1) dari koleksi.
+
+    Journal adalah sumber kebenaran: perubahan hanya di-append ke journal, file json koleksi
+    adalah snapshot yang ditulis setiap SNAPSHOT_OPS record, saat checkpoint dan close().
+    Posisi snapshot terakhir (seq, offset) dan stack undo/redo disimpan di file state, jadi
+    saat start hanya record sesudahnya yang di-replay. auto_compact: buang bagian journal
+    yang sudah ter-snapshot (matikan jika journal juga dibaca client sync, lihat compactable).
+    read_only: hanya replay ke koleksi di memori; tidak ada file yang ditulis (json koleksi,
+    state, compact), jadi jangan panggil execute/undo/redo/close.
+    """
+    def __init__(self, path, collections, save, on_change=None, auto_compact=True, read_only=False):
+        self.path = path
+        self.state_path = os.path.splitext(path)[0] + "_state.json"
+        self.collections = collections
+        self.save = save
+        self.on_change = on_change
+        self.auto_compact = auto_compact
+        self.read_only = read_only
+        self.observers = []
+        self.seq = 0
+        self.snapshot_seq = 0
+        self.snapshot_offset = 0
+        self.dirty = set()
+        self.pending = 0
+        self.undo_stack = deque(maxlen=MAX_UNDO)
+        self.redo_stack = deque(maxlen=MAX_UNDO)
+        for name, entries in collections.items():
+            if ensure_ids(name, entries) and not read_only:
+                save(name)
+        # himpunan id per koleksi supaya operasi dari sync bisa dicek idempoten dalam O(1)
+        self.ids = {name: {e["id"] for e in entries} for name, entries in collections.items()}
+        self._replay()
+
+    def _replay(self):
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                state = json.load(f)
+            self.seq = self.snapshot_seq = state["seq"]
+            self.snapshot_offset = state["offset"]
+            self.undo_stack.extend(state["undo"])
+            self.redo_stack.extend(state["redo"])
+        except (OSError, ValueError, KeyError):
+            # journal lama tanpa state: file json sudah memuat semua perubahan,
+            # journal hanya dibaca untuk stack undo/redo lalu langsung di-snapshot
+            state = None
+        try:
+            with open(self.path, "rb") as f:
+                if state is not None and self.snapshot_offset <= os.fstat(f.fileno()).st_size:
+                    f.seek(self.snapshot_offset)
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        continue
+                    if state is not None and rec.get("seq", 0) <= self.snapshot_seq:
+                        continue  # sudah tercakup snapshot (mis. offset lama setelah compact terputus)
+                    self._replay_record(rec, apply_data=state is not None)
+        except OSError:
+            pass
+        if (state is None or self.pending) and not self.read_only:
+            self.snapshot()
+
+    def _replay_record(self, rec, apply_data):
+        self.seq = max(self.seq, rec.get("seq", 0))
+        kind = rec.get("type")
+        if apply_data and kind in ("do", "undo", "redo", "remote"):
+            # changes di setiap record sudah berupa delta maju; diterapkan idempoten per id
+            # karena file json bisa saja sudah ditulis sebagian sebelum proses berhenti
+            for change in rec.get("changes", []):
+                fresh = self._unapplied(change)
+                if fresh is not None:
+                    self._apply(fresh)
+                    self.dirty.add(fresh["coll"])
+            self.pending += 1
+        if kind == "do":
+            self.undo_stack.append(rec)
+            self.redo_stack.clear()
+        elif kind == "undo" and self.undo_stack and self.undo_stack[-1]["seq"] == rec["ref"]:
+            self.redo_stack.append(self.undo_stack.pop())
+        elif kind == "redo" and self.redo_stack and self.redo_stack[-1]["seq"] == rec["ref"]:
+            self.undo_stack.append(self.redo_stack.pop())
+        elif kind == "checkpoint":
+            self.undo_stack.clear()
+            self.redo_stack.clear()
+
+    def _unapplied(self, change):
+        """Bagian dari change yang belum berlaku di koleksi (berdasarkan id), atau None."""
+        coll = change.get("coll")
+        if coll not in self.collections:
+            return None
+        if change["action"] == "add":
+            fresh = [e for e in change["entries"] if e.get("id") and e["id"] not in self.ids[coll]]
+            return add(coll, fresh) if fresh else None
+        if change["entry"].get("id") in self.ids[coll]:
+            return remove(coll, change.get("index", -1), change["entry"])
+        return None
+
+    def _append(self, rec):
+        self.seq += 1
+        rec["seq"] = self.seq
+        rec["ts"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        return rec
+
+    def _find(self, entries, entry_id, hint):
+        if 0 <= hint < len(entries) and entries[hint].get("id") == entry_id:
+            return hint
+        # data berubah di luar command log: cari berdasarkan id
+        for i, entry in enumerate(entries):
+            if entry.get("id") == entry_id:
+                return i
+        return -1
+
+    def _notify(self, coll, entries, sign):
+        for observer in self.observers:
+            observer(coll, entries, sign)
+
+    def _apply(self, change, inverse=False):
+        entries = self.collections[change["coll"]]
+        ids = self.ids[change["coll"]]
+        action = change["action"]
+        if inverse:
+            action = "remove_added" if action == "add" else "reinsert"
+        if action == "add":
+            change["start"] = len(entries)
+            entries.extend(change["entries"])
+            ids.update(e["id"] for e in change["entries"])
+            self._notify(change["coll"], change["entries"], 1)
+        elif action == "remove_added":
+            # entri yang di-append biasanya masih di ujung list
+            start = change.get("start", len(entries) - len(change["entries"]))
+            for offset in range(len(change["entries"]) - 1, -1, -1):
+                entry = change["entries"][offset]
+                i = self._find(entries, entry["id"], start + offset)
+                if i >= 0:
+                    del entries[i]
+                    ids.discard(entry["id"])
+                    self._notify(change["coll"], [entry], -1)
+        elif action == "remove":
+            i = self._find(entries, change["entry"]["id"], change["index"])
+            if i >= 0:
+                del entries[i]
+                ids.discard(change["entry"]["id"])
+                change["index"] = i
+                self._notify(change["coll"], [change["entry"]], -1)
+        elif action == "reinsert":
+            index = change["index"] if change["index"] >= 0 else len(entries)
+            entries.insert(min(index, len(entries)), change["entry"])
+            ids.add(change["entry"]["id"])
+            self._notify(change["coll"], [change["entry"]], 1)
+
+    def _save_touched(self, changes):
+        # cukup ditandai: record journal sudah menjamin perubahan tidak hilang
+        self.dirty.update(c["coll"] for c in changes)
+        self.pending += 1
+        if self.pending >= SNAPSHOT_OPS:
+            self.snapshot()
+        if self.on_change is not None:
+            self.on_change()
+
+    def _write_state(self):
+        state = {"seq": self.snapshot_seq, "offset": self.snapshot_offset,
+                 "undo": list(self.undo_stack), "redo": list(self.redo_stack)}
+        tmp = self.state_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp, self.state_path)
+
+    def snapshot(self):
+        """Tulis koleksi yang berubah ke file json dan catat posisi journal yang sudah tercakup."""
+        for coll in sorted(self.dirty):
+            self.save(coll)
+        self.dirty.clear()
+        self.pending = 0
+        self.snapshot_seq = self.seq
+        self.snapshot_offset = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        self._write_state()
+        if self.auto_compact:
+            self.compact(self.compactable())
+
+    close = snapshot
+
+    def compactable(self, keep_from=None):
+        """Jumlah byte awal journal yang boleh dibuang (0 jika belum sebesar COMPACT_BYTES).
+
+        keep_from: offset yang masih dibutuhkan pembaca lain (mis. offset push client sync).
+        """
+        cut = self.snapshot_offset if keep_from is None else min(keep_from, self.snapshot_offset)
+        return cut if cut >= COMPACT_BYTES else 0
+
+    def compact(self, cut):
+        """Buang `cut` byte awal journal (hasil compactable); offset pembaca lain harus digeser sebesar cut."""
+        if cut <= 0:
+            return
+        with open(self.path, "rb") as f:
+            f.seek(cut)
+            tail = f.read()
+        # state ditulis lebih dulu: jika proses terhenti sebelum journal diganti, replay membaca
+        # journal lama dari offset yang lebih kecil dan record lama dilewati lewat seq
+        self.snapshot_offset -= cut
+        self._write_state()
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(tail)
+        os.replace(tmp, self.path)
+
+    def execute(self, kind, label, changes):
+        """Jalankan perubahan (add/remove), catat ke journal, simpan koleksi yang berubah."""
+        changes = [c for c in changes if c["action"] != "add" or c["entries"]]
+        if not changes:
+            return None
+        for change in changes:
+            if change["action"] == "add":
+                for entry in change["entries"]:
+                    entry.setdefault("id", new_id())
+            self._apply(change)
+        rec = self._append({"type": "do", "op_id": new_id(), "kind": kind, "label": label, "changes": changes})
+        self.undo_stack.append(rec)
+        self.redo_stack.clear()
+        self._save_touched(changes)
+        return rec
+
+    def apply_remote(self, ops):
+        """Terapkan operasi dari PC lain (hasil sync) tanpa masuk stack undo.
+
+        Idempoten: entri yang id-nya sudah ada tidak ditambah lagi, hapus untuk id yang
+        tidak ada dilewati.
+        """
+        touched = []
+        for op in ops:
+            applied = [c for c in map(self._unapplied, op.get("changes", [])) if c is not None]
+            for change in applied:
+                self._apply(change)
+            if applied:
+                self._append({"type": "remote", "op_id": op["op_id"], "changes": applied})
+                touched.extend(applied)
+        if touched:
+            self._save_touched(touched)
+        return len(touched)
+
+    def checkpoint(self, reason):
+        """Koleksi diubah di luar command log (mis. arsip): kosongkan stack undo/redo, hitung ulang id
+        dan snapshot semua koleksi, supaya replay tidak pernah melewati perubahan di luar journal.
+
+        on_change tidak dipanggil; pemanggil yang memperbarui tampilan.
+        """
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self.ids = {name: {e["id"] for e in entries} for name, entries in self.collections.items()}
+        self._append({"type": "checkpoint", "reason": reason})
+        self.dirty.update(self.collections)
+        self.snapshot()
+
+    def can_undo(self):
+        return bool(self.undo_stack)
+
+    def can_redo(self):
+        return bool(self.redo_stack)
+
+    def undo_label(self):
+        return self.undo_stack[-1]["label"] if self.undo_stack else ""
+
+    def redo_label(self):
+        return self.redo_stack[-1]["label"] if self.redo_stack else ""
+
+    def undo(self):
+        if not self.undo_stack:
+            return None
+        rec = self.undo_stack.pop()
+        for change in reversed(rec["changes"]):
+            self._apply(change, inverse=True)
+        self._append({"type": "undo", "ref": rec["seq"], "op_id": new_id(), "changes": inverse(rec["changes"])})
+        self.redo_stack.append(rec)
+        self._save_touched(rec["changes"])
+        return rec
+
+    def redo(self):
+        if not self.redo_stack:
+            return None
+        rec = self.redo_stack.pop()
+        for change in rec["changes"]:
+            self._apply(change)
+        self._append({"type": "redo", "ref": rec["seq"], "op_id": new_id(), "changes": rec["changes"]})
+        self.undo_stack.append(rec)
+        self._save_touched(rec["changes"])
+        return rec
+
+
+SYNC_TYPES = ("do", "undo", "redo")
+
+
+def read_journal(path, offset=0):
+    """Baca record journal lokal (do/undo/redo) mulai dari byte `offset`.
+
+    Kembalikan (records, offset_baru); record "remote" dilewati supaya tidak dikirim balik.
+    """
+    records = []
+    try:
+        with open(path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # baris terakhir belum selesai ditulis
+                offset += len(line)
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue
+                if rec.get("type") in SYNC_TYPES:
+                    records.append(rec)
+    except OSError:
+        pass
+    return records, offset
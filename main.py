@@ -3,29 +3,47 @@
 import sys
 import csv
 import os
+from collections import Counter
 from datetime import datetime
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QTabWidget, QVBoxLayout, QHBoxLayout,
     QLabel, QLineEdit, QPushButton, QComboBox, QTableWidget, QTableWidgetItem,
     QHeaderView, QSpinBox, QFileDialog, QGroupBox, QMessageBox, QListWidget,
     QMenu, QAbstractItemView, QSizePolicy, QSpacerItem, QDialog, QDateEdit,
-    QCompleter
+    QCompleter, QTableView, QListView, QPlainTextEdit, QCheckBox, QInputDialog
+)
+from PySide6.QtGui import QIcon, QDesktopServices, QAction, QPalette, QColor, QKeySequence
+from PySide6.QtCore import (
+    Qt, QUrl, QDate, QAbstractTableModel, QModelIndex, QStringListModel, QTimer, Signal
 )
-from PySide6.QtGui import QIcon, QDesktopServices, QAction, QPalette
-from PySide6.QtCore import Qt, QUrl, QDate
 
 import json
+import argparse
+import threading
+
+from metrics import METRICS
+import journal
+from history import HistoryStore
+from reports import ReportFile, load_report_files, rotated_report_files
+from sync import SyncClient
+from masterdata import MasterRegistry
+from archive import Archive, retention_cutoff
+from persist import Persister
+from forecast import Forecaster, format_report, WARN_DAYS
+from csvio import RowErrors, read_dicts
 
 APP_NAME = "Log Material Gudang CKT Purwokerto"
 VERSION = "1.3.1"
 
 DATA_DIR = os.path.join(os.path.expanduser("~"), ".material_tracker")
-if not os.path.exists(DATA_DIR):
-    os.makedirs(DATA_DIR)
 
 def data_path(filename):
     return os.path.join(DATA_DIR, filename)
 
+# index offset baris file laporan (lihat reports.py)
+REPORT_INDEX_DIR = data_path("report_index")
+
+@METRICS.timed("load_json")
 def load_json(filename, default):
     try:
         with open(data_path(filename), "r", encoding="utf-8") as f:
@@ -33,26 +51,105 @@ def load_json(filename, default):
     except Exception:
         return default
 
+@METRICS.timed("save_json")
 def save_json(filename, data):
     with open(data_path(filename), "w", encoding="utf-8") as f:
         json.dump(data, f, indent=2, ensure_ascii=False)
 
-# Default containers
-DEFAULT_DIVISI = []
-DEFAULT_TIM = []
-DEFAULT_MATERIAL = []
-DEFAULT_AKSESORI = []
-
-DIVISI = load_json("divisi.json", DEFAULT_DIVISI)
-TIM = load_json("tim.json", DEFAULT_TIM)
-MATERIAL = load_json("material.json", DEFAULT_MATERIAL)
-AKSESORI = load_json("aksesori.json", DEFAULT_AKSESORI)
-
-HISTORI_MAT = load_json("histori_kabel_aksesori.json", [])
-HISTORI_ONT = load_json("histori_ont.json", [])
-STOCK_ENTRIES = load_json("stock_entries.json", [])
-
-LAST_SELECTION = load_json("last_selection.json", {"divisi": "", "tim": ""})
+DRAFT_FILE = "draft_pengambilan.json"
+
+# Default containers, diisi oleh init_data()
+PERSIST = None
+MASTER = DIVISI = TIM = MATERIAL = AKSESORI = None
+HISTORI_MAT = HISTORI_ONT = STOCK_ENTRIES = None
+LAST_SELECTION = SYNC_CONFIG = RETENTION = None
+ARCHIVE = None
+HISTORY_FILES = {}
+
+def init_data():
+    """Muat semua data aplikasi ke variabel global (sekali, dari main()).
+
+    Sengaja tidak dijalankan saat modul diimpor: worker pool laporan dengan start method
+    spawn (Windows/macOS) mengimpor ulang main.py, dan tidak boleh ikut memuat histori,
+    menyalakan thread Persister atau menulis file master.
+    """
+    global PERSIST, MASTER, DIVISI, TIM, MATERIAL, AKSESORI, HISTORI_MAT, HISTORI_ONT, STOCK_ENTRIES
+    global LAST_SELECTION, SYNC_CONFIG, RETENTION, ARCHIVE
+    if PERSIST is not None:
+        return
+    os.makedirs(DATA_DIR, exist_ok=True)
+    # file pengaturan kecil & draft ditulis di thread latar (debounce); histori tetap ditulis langsung
+    PERSIST = Persister(DATA_DIR)
+
+    # daftar master: cek keanggotaan O(1), ejaan beda kapital/spasi digabung, alias di aliases.json
+    MASTER = MasterRegistry(load_json, PERSIST.write)
+    MASTER.save()  # tulis ulang jika ada duplikat yang digabung saat load
+    DIVISI = MASTER.divisi
+    TIM = MASTER.tim
+    MATERIAL = MASTER.material
+    AKSESORI = MASTER.aksesori
+
+    HISTORI_MAT = load_json("histori_kabel_aksesori.json", [])
+    HISTORI_ONT = load_json("histori_ont.json", [])
+    STOCK_ENTRIES = load_json("stock_entries.json", [])
+
+    LAST_SELECTION = load_json("last_selection.json", {"divisi": "", "tim": ""})
+
+    # sync antar PC (opsional): isi "server" dengan alamat server sync, mis. http://192.168.1.10:8765
+    SYNC_CONFIG = load_json("sync.json", {"server": "", "interval": 60})
+
+    # retensi: histori lebih lama dari "bulan" dipindah ke arsip terkompresi (0 = nonaktif)
+    RETENTION = load_json("retensi.json", {"bulan": 0})
+    ARCHIVE = Archive(data_path("archive"))
+
+    # koleksi histori yang dicatat oleh command log (undo/redo)
+    HISTORY_FILES.update({
+        "mat": ("histori_kabel_aksesori.json", HISTORI_MAT),
+        "ont": ("histori_ont.json", HISTORI_ONT),
+        "stock": ("stock_entries.json", STOCK_ENTRIES),
+    })
+
+def save_history(coll):
+    filename, data = HISTORY_FILES[coll]
+    save_json(filename, data)
+
+def archive_count(seg, query_args):
+    # jumlah entri segmen arsip yang cocok dengan filter tim/divisi tab histori
+    return ARCHIVE.segment_count(seg, query_args.get("tim"), query_args.get("divisi"), TIM.key, DIVISI.key)
+
+def position_of(entries, entry):
+    # cocokkan objeknya, bukan isinya: entri kembar (submit sama dalam satu detik) tidak tertukar
+    return next((i for i, e in enumerate(entries) if e is entry), -1)
+
+def skipped_rows_text(errors):
+    # ringkasan baris CSV yang dilewati, untuk ditambahkan ke pesan selesai import
+    if not errors:
+        return ""
+    return f"\n\n{errors.count} baris dilewati:\n{errors.summary()}"
+
+def open_command_log(on_change=None, read_only=False):
+    # journal = sumber kebenaran: record sesudah snapshot terakhir di-replay ke HISTORI_* di sini.
+    # Jika sync aktif, journal hanya dipadatkan setelah push (lihat on_sync_finished)
+    return journal.CommandLog(
+        data_path("journal.jsonl"),
+        {coll: data for coll, (_, data) in HISTORY_FILES.items()},
+        save_history,
+        on_change=on_change,
+        auto_compact=not SYNC_CONFIG.get("server", "").strip(),
+        read_only=read_only,
+    )
+
+@METRICS.timed("build_forecast")
+def build_forecaster():
+    # sekali saat start; selanjutnya diperbarui per kejadian lewat observer command log
+    forecaster = Forecaster(key=MASTER.item_key)
+    forecaster.apply("mat", HISTORI_MAT)
+    forecaster.apply("stock", STOCK_ENTRIES)
+    for seg in ARCHIVE.months("mat"):
+        forecaster.add_totals(diambil=seg.get("items"))
+    for seg in ARCHIVE.months("stock"):
+        forecaster.add_totals(masuk=seg.get("items"))
+    return forecaster
 
 def apply_theme(app, dark=False):
     if dark:
@@ -70,6 +167,121 @@ def apply_theme(app, dark=False):
         app.setStyle("Fusion")
         app.setPalette(app.style().standardPalette())
 
+class CompletionIndex:
+    """Index item bersama untuk semua combo/completer (material, tim, divisi, SN).
+
+    Satu QStringListModel dipakai bersama oleh semua combo; pencarian substring/fuzzy
+    diurutkan menurut frekuensi pemakaian di histori.
+    """
+    def __init__(self, items=(), usage=None):
+        self.model = QStringListModel()
+        self.usage = Counter(usage or {})
+        self._keys = {}
+        self._rows = {}  # item -> baris di model, supaya hapus tidak perlu mencari di stringList
+        self._last_query = None
+        self._last_matches = None
+        self.sync(items)
+
+    def __contains__(self, item):
+        return item in self._keys
+
+    def _invalidate(self):
+        self._last_query = None
+        self._last_matches = None
+
+    def add(self, item):
+        if not item or item in self._keys:
+            return
+        self._keys[item] = item.lower()
+        row = self._rows[item] = self.model.rowCount()
+        self.model.insertRows(row, 1)
+        self.model.setData(self.model.index(row, 0), item)
+        self._invalidate()
+
+    def remove(self, item):
+        # O(1): baris terakhir dipindah ke baris yang kosong, jadi urutan model tidak dijaga
+        if item not in self._keys:
+            return
+        del self._keys[item]
+        row = self._rows.pop(item)
+        last = self.model.rowCount() - 1
+        if row != last:
+            moved = self.model.data(self.model.index(last, 0))
+            self.model.setData(self.model.index(row, 0), moved)
+            self._rows[moved] = row
+        self.model.removeRows(last, 1)
+        self._invalidate()
+
+    def sync(self, items):
+        # update bertahap: hanya item yang berubah yang menyentuh model; urutan item lain tetap
+        items = [item for item in dict.fromkeys(items) if item]
+        wanted = set(items)
+        removed = [item for item in self._keys if item not in wanted]
+        if removed:
+            # dari baris terbawah supaya nomor baris yang belum dihapus tetap benar
+            for row in sorted((self._rows.pop(item) for item in removed), reverse=True):
+                self.model.removeRows(row, 1)
+            for item in removed:
+                del self._keys[item]
+            self._rows = {item: row for row, item in enumerate(self.model.stringList())}
+            self._invalidate()
+        for item in items:
+            self.add(item)
+
+    def bump(self, item, n=1):
+        self.usage[item] += n
+        self._invalidate()
+
+    def search(self, text, limit=50):
+        text = text.strip().lower()
+        if not text:
+            ranked = sorted(self._keys, key=lambda item: (-self.usage[item], self._keys[item]))
+            return ranked[:limit]
+        # ketikan lanjutan cukup menyaring hasil sebelumnya
+        if self._last_query and text.startswith(self._last_query):
+            candidates = self._last_matches
+        else:
+            candidates = self._keys
+        matches = []
+        for item in candidates:
+            key = self._keys[item]
+            if key.startswith(text):
+                tier = 0
+            elif " " + text in " " + key:
+                tier = 1
+            elif text in key:
+                tier = 2
+            else:
+                it = iter(key)
+                if not all(c in it for c in text):
+                    continue
+                tier = 3
+            matches.append((tier, -self.usage[item], key, item))
+        self._last_query = text
+        self._last_matches = [m[3] for m in matches]
+        matches.sort()
+        return [m[3] for m in matches[:limit]]
+
+class FuzzyCompleter(QCompleter):
+    """QCompleter yang hasilnya diambil dari CompletionIndex (substring/fuzzy + frekuensi)."""
+    def __init__(self, index, parent=None):
+        super().__init__(parent)
+        self.index = index
+        self.results = QStringListModel(self)
+        self.setModel(self.results)
+        self.setCompletionMode(QCompleter.PopupCompletion)
+        self.setCaseSensitivity(Qt.CaseInsensitive)
+
+    def splitPath(self, path):
+        self.results.setStringList(self.index.search(path))
+        # penyaringan sudah dilakukan index; QCompleter tinggal menampilkan semua hasil
+        return [""]
+
+def attach_completion(combo, index):
+    # combo memakai model bersama (tanpa salin daftar) + completer fuzzy
+    combo.setModel(index.model)
+    combo.setCompleter(FuzzyCompleter(index, combo))
+
 class EditableListBox(QWidget):
     def __init__(self, items, label):
         super().__init__()
@@ -79,7 +291,7 @@ class EditableListBox(QWidget):
         vbox = QVBoxLayout()
         self.grp.setLayout(vbox)
         self.list_widget = QListWidget()
-        self.list_widget.addItems(self.items)
+        self.list_widget.addItems(list(self.items))
         vbox.addWidget(self.list_widget)
         form_hbox = QHBoxLayout()
         self.edit = QLineEdit()
@@ -99,27 +311,26 @@ class EditableListBox(QWidget):
     def add_item(self):
         val = self.edit.text().strip()
         if val and val not in self.items:
-            self.items.append(val)
-            self.list_widget.addItem(val)
+            self.list_widget.addItem(self.items.add(val))
             self.edit.clear()
 
     def del_item(self):
         idx = self.list_widget.currentRow()
         if idx >= 0:
-            self.items.pop(idx)
+            self.items.remove_at(idx)
             self.list_widget.takeItem(idx)
 
     def edit_item(self):
         idx = self.list_widget.currentRow()
         val = self.edit.text().strip()
-        if idx >= 0 and val and val not in self.items:
-            self.items[idx] = val
-            self.list_widget.item(idx).setText(val)
+        # nama lama tetap dikenali sebagai alias dari nama baru
+        if idx >= 0 and val and self.items.rename(idx, val):
+            self.list_widget.item(idx).setText(self.items[idx])
             self.edit.clear()
 
     def reload(self):
         self.list_widget.clear()
-        self.list_widget.addItems(self.items)
+        self.list_widget.addItems(list(self.items))
 
 class SettingsDialog(QDialog):
     def __init__(self, parent=None):
@@ -146,10 +357,7 @@ class SettingsDialog(QDialog):
         layout.addLayout(btn_layout)
 
     def save(self):
-        save_json("divisi.json", DIVISI)
-        save_json("tim.json", TIM)
-        save_json("material.json", MATERIAL)
-        save_json("aksesori.json", AKSESORI)
+        MASTER.save(force=True)
         QMessageBox.information(self, "Berhasil", "Pengaturan disimpan.")
         self.accept()
 
@@ -159,6 +367,300 @@ class SettingsDialog(QDialog):
         self.mat_box.reload()
         self.aks_box.reload()
 
+class ReportTableModel(QAbstractTableModel):
+    """Model tabel laporan; isi sel dibaca lazy dari ReportFile (mmap)."""
+    def __init__(self, columns):
+        super().__init__()
+        self.columns = columns
+        self.refs = []
+
+    def set_rows(self, refs):
+        self.beginResetModel()
+        self.refs = refs
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.refs)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        rf, i = self.refs[index.row()]
+        return rf.row(i)[index.column()]
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.columns[section]
+        return str(section + 1)
+
+class HistoryTableModel(QAbstractTableModel):
+    """Model histori berhalaman: baris diambil dari HistoryView lewat canFetchMore/fetchMore.
+
+    columns: list (judul, fungsi teks(entry), fungsi warna(entry) atau None). Kolom "No"
+    dihitung virtual dari nomor baris, kolom "Aksi" berisi tombol hapus (tanpa kolom ini
+    jika actions=False, mis. untuk arsip yang hanya-baca).
+    """
+    PAGE_SIZE = 200
+
+    def __init__(self, store, columns, actions=True):
+        super().__init__()
+        self.store = store
+        self.columns = columns
+        self.actions = actions
+        self.headers = ["No"] + [c[0] for c in columns] + (["Aksi"] if actions else [])
+        self.view = None
+        self.rows = []
+        self.cursor = None
+        self.exhausted = True
+
+    def reset(self, view=None):
+        self.beginResetModel()
+        self.view = view if view is not None else self.store.query()
+        self.rows = []
+        self.cursor = None
+        self.exhausted = False
+        self.endResetModel()
+        self.fetchMore()
+
+    def entry(self, row):
+        return self.store.by_serial.get(self.rows[row])
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self.exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self.exhausted:
+            return
+        rows, self.cursor = self.view.fetch(self.cursor, self.PAGE_SIZE)
+        self.exhausted = self.cursor is None
+        if rows:
+            first = len(self.rows)
+            self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+            self.rows.extend(rows)
+            self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row, col = index.row(), index.column()
+        if col == 0:
+            if role == Qt.DisplayRole:
+                return str(row + 1)
+            if role == Qt.TextAlignmentRole:
+                return int(Qt.AlignCenter)
+            return None
+        if self.actions and col == len(self.headers) - 1:
+            if role == Qt.DisplayRole:
+                return "🗑"
+            if role == Qt.TextAlignmentRole:
+                return int(Qt.AlignCenter)
+            if role == Qt.BackgroundRole:
+                return QColor("#f44336")
+            if role == Qt.ForegroundRole:
+                return QColor("white")
+            if role == Qt.ToolTipRole:
+                return "Hapus"
+            return None
+        _, text_fn, color_fn = self.columns[col - 1]
+        entry = self.store.by_serial.get(self.rows[row])
+        if entry is None:
+            return None
+        if role == Qt.DisplayRole:
+            return text_fn(entry)
+        if role == Qt.ForegroundRole and color_fn is not None:
+            return QColor(color_fn(entry))
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.headers[section]
+        return None
+
+class HistoryFilterBar(QWidget):
+    """Filter rentang tanggal, tim dan divisi untuk tab histori di Resume."""
+    changed = Signal()
+
+    def __init__(self, idx_tim, idx_divisi):
+        super().__init__()
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.chk_tanggal = QCheckBox("Tanggal:")
+        self.chk_tanggal.toggled.connect(self.on_toggle_tanggal)
+        layout.addWidget(self.chk_tanggal)
+        self.date_from = QDateEdit()
+        self.date_from.setCalendarPopup(True)
+        self.date_from.setDate(QDate.currentDate().addDays(-7))
+        layout.addWidget(self.date_from)
+        layout.addWidget(QLabel("s/d"))
+        self.date_to = QDateEdit()
+        self.date_to.setCalendarPopup(True)
+        self.date_to.setDate(QDate.currentDate())
+        layout.addWidget(self.date_to)
+        self.date_from.dateChanged.connect(self.changed)
+        self.date_to.dateChanged.connect(self.changed)
+        self.on_toggle_tanggal(False)
+
+        # kosong = semua; pakai QLineEdit supaya tidak ada item yang terpilih otomatis
+        self.edit_tim = self.make_edit(idx_tim, "Semua tim")
+        layout.addWidget(QLabel("Tim:"))
+        layout.addWidget(self.edit_tim)
+        self.edit_divisi = self.make_edit(idx_divisi, "Semua divisi")
+        layout.addWidget(QLabel("Divisi:"))
+        layout.addWidget(self.edit_divisi)
+
+    def make_edit(self, index, placeholder):
+        edit = QLineEdit()
+        edit.setPlaceholderText(placeholder)
+        edit.setClearButtonEnabled(True)
+        edit.setCompleter(FuzzyCompleter(index, edit))
+        edit.textChanged.connect(self.changed)
+        return edit
+
+    def on_toggle_tanggal(self, checked):
+        self.date_from.setEnabled(checked)
+        self.date_to.setEnabled(checked)
+        self.changed.emit()
+
+    def query_args(self):
+        args = {
+            "tim": self.edit_tim.text().strip() or None,
+            "divisi": self.edit_divisi.text().strip() or None,
+        }
+        if self.chk_tanggal.isChecked():
+            args["date_from"] = int(self.date_from.date().toString("yyyyMMdd")) * 1000000
+            args["date_to"] = int(self.date_to.date().toString("yyyyMMdd")) * 1000000 + 235959
+        return args
+
+class ArchiveDialog(QDialog):
+    """Lihat histori yang sudah diarsipkan: ringkasan per bulan dari index, entri dimuat saat diminta."""
+    def __init__(self, coll, title, columns, query_args, predicate=None, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"Arsip {title}")
+        self.setMinimumSize(720, 520)
+        self.coll = coll
+        self.query_args = dict(query_args)
+        self.predicate = predicate
+        layout = QVBoxLayout(self)
+
+        # jumlah per bulan memakai filter tim/divisi yang sama dengan label "+N entri di arsip"
+        counts = [(seg, archive_count(seg, self.query_args))
+                  for seg in ARCHIVE.months(coll, self.query_args.get("date_from"), self.query_args.get("date_to"))]
+        months = [(seg, n) for seg, n in counts if n]
+        headers = ["Bulan", "Entri"] + (["Total Qty"] if coll != "ont" else [])
+        self.tbl_summary = QTableWidget(len(months), len(headers))
+        self.tbl_summary.setHorizontalHeaderLabels(headers)
+        self.tbl_summary.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.tbl_summary.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.tbl_summary.verticalHeader().hide()
+        for row, (seg, n) in enumerate(months):
+            self.tbl_summary.setItem(row, 0, QTableWidgetItem(seg["month"]))
+            self.tbl_summary.setItem(row, 1, QTableWidgetItem(str(n)))
+            if coll != "ont":
+                self.tbl_summary.setItem(row, 2, QTableWidgetItem(str(sum(seg.get("items", {}).values()))))
+        self.tbl_summary.setMaximumHeight(180)
+        layout.addWidget(self.tbl_summary)
+
+        self.btn_load = QPushButton("Tampilkan Entri Arsip")
+        self.btn_load.clicked.connect(self.load_entries)
+        self.btn_load.setEnabled(bool(months))
+        layout.addWidget(self.btn_load)
+
+        self.store = HistoryStore([], tim_key=TIM.key, divisi_key=DIVISI.key)
+        self.model = HistoryTableModel(self.store, columns, actions=False)
+        self.tbl_entries = QTableView()
+        self.tbl_entries.setModel(self.model)
+        self.tbl_entries.verticalHeader().hide()
+        self.tbl_entries.setEditTriggers(QTableView.NoEditTriggers)
+        self.tbl_entries.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        layout.addWidget(self.tbl_entries)
+
+    def load_entries(self):
+        # baru di sini segmen bulan yang beririsan dengan filter didekompresi
+        args = self.query_args
+        with METRICS.timer("archive_load"):
+            self.store.entries = ARCHIVE.entries(self.coll, args.get("date_from"), args.get("date_to"))
+            self.store.rebuild()
+        self.model.reset(self.store.query(predicate=self.predicate, **args))
+        self.btn_load.setEnabled(False)
+
+class MetricsDialog(QDialog):
+    """Panel diagnostik: latensi terakhir per operasi, counter, dan rekam cProfile."""
+    TIMER_COLUMNS = ["Operasi", "Jumlah", "Terakhir (ms)", "p50", "p90", "p99", "Maks"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Diagnostik Performa")
+        self.setMinimumSize(720, 480)
+        layout = QVBoxLayout(self)
+
+        self.tbl_timers = QTableWidget(0, len(self.TIMER_COLUMNS))
+        self.tbl_timers.setHorizontalHeaderLabels(self.TIMER_COLUMNS)
+        self.tbl_timers.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.tbl_timers.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.tbl_timers)
+        self.lbl_counters = QLabel()
+        self.lbl_counters.setWordWrap(True)
+        layout.addWidget(self.lbl_counters)
+
+        self.txt_profile = QPlainTextEdit()
+        self.txt_profile.setReadOnly(True)
+        self.txt_profile.setPlaceholderText("Hasil cProfile muncul di sini setelah rekaman dihentikan.")
+        layout.addWidget(self.txt_profile)
+
+        btn_layout = QHBoxLayout()
+        self.btn_profile = QPushButton()
+        self.btn_profile.clicked.connect(self.toggle_profile)
+        btn_layout.addWidget(self.btn_profile)
+        btn_reset = QPushButton("Reset")
+        btn_reset.clicked.connect(self.reset)
+        btn_layout.addWidget(btn_reset)
+        btn_layout.addItem(QSpacerItem(40, 20, QSizePolicy.Expanding, QSizePolicy.Minimum))
+        btn_layout.addWidget(QLabel(f"Log: {data_path('metrics.log')}"))
+        layout.addLayout(btn_layout)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(1000)
+        self.refresh()
+
+    def refresh(self):
+        snap = METRICS.snapshot()
+        self.tbl_timers.setRowCount(0)
+        for name, stats in snap["timers"].items():
+            if not stats:
+                continue
+            row = self.tbl_timers.rowCount()
+            self.tbl_timers.insertRow(row)
+            values = [name, str(stats["count"])] + [f"{stats[k]:.2f}" for k in ("last", "p50", "p90", "p99", "max")]
+            for col, val in enumerate(values):
+                self.tbl_timers.setItem(row, col, QTableWidgetItem(val))
+        counters = ", ".join(f"{k}: {v}" for k, v in sorted(snap["counters"].items()))
+        self.lbl_counters.setText(f"Counter: {counters or '-'}")
+        self.btn_profile.setText("Hentikan cProfile" if METRICS.profiling else "Mulai Rekam cProfile")
+
+    def toggle_profile(self):
+        if METRICS.profiling:
+            path = data_path(f"profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}.prof")
+            self.txt_profile.setPlainText(f"Disimpan ke {path}\n\n" + METRICS.stop_profile(path))
+        else:
+            METRICS.start_profile()
+        self.refresh()
+
+    def reset(self):
+        METRICS.reset()
+        self.refresh()
+
 class TelegramReportTab(QWidget):
     """Generik tab laporan (MyRepublic, Asianet, Oxygen)."""
     def __init__(self, report_type):
@@ -204,11 +706,11 @@ class TelegramReportTab(QWidget):
         self.date_to.dateChanged.connect(self.filter_table)
         self.layout.addLayout(filter_layout)
 
-        self.tbl = QTableWidget()
-        self.tbl.setColumnCount(len(self.columns))
-        self.tbl.setHorizontalHeaderLabels(self.columns)
+        self.model = ReportTableModel(self.columns)
+        self.tbl = QTableView()
+        self.tbl.setModel(self.model)
         self.tbl.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        self.tbl.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.tbl.setEditTriggers(QTableView.NoEditTriggers)
         self.layout.addWidget(self.tbl)
 
         btn_layout = QHBoxLayout()
@@ -220,78 +722,74 @@ class TelegramReportTab(QWidget):
         export_btn.clicked.connect(self.export_csv)
         btn_layout.addWidget(export_btn)
         btn_layout.addItem(QSpacerItem(20, 20, QSizePolicy.Expanding, QSizePolicy.Minimum))
+        self.lbl_status = QLabel("")
+        self.lbl_status.setStyleSheet("color:#E65100")
+        btn_layout.addWidget(self.lbl_status)
         self.layout.addLayout(btn_layout)
 
-        # Muat laporan pertama kali
-        self.load_reports()
+        # Laporan dimuat oleh MaterialTracker (paralel untuk semua tab)
+        self.report_files = []
 
-    def load_reports(self):
-        self.raw_rows = []
-        self.tbl.setRowCount(0)
-        if os.path.exists(self.csv_file):
-            try:
-                with open(self.csv_file, newline='', encoding="utf-8") as f:
-                    reader = csv.DictReader(f)
-                    for row in reader:
-                        if self.report_type == 'asianet':
-                            mapped = {
-                                "Timestamp": row.get("Timestamp", "") or row.get("Tanggal", ""),
-                                "Subscription ID": row.get("ID Pelanggan", ""),
-                                "Customer": row.get("Nama Pelanggan", ""),
-                                "SN": row.get("SN", ""),
-                                "Team": row.get("Nama Teknisi", "")
-                            }
-                        else:
-                            mapped = {
-                                "Timestamp": row.get("Timestamp", "") or row.get("tanggal", ""),
-                                "Subscription ID": row.get("Subscription ID", "") or row.get("ID Pelanggan", ""),
-                                "Customer": row.get("Customer", "") or row.get("Nama Pelanggan", ""),
-                                "SN": row.get("SN", "") or row.get("Serial Number", ""),
-                                "Team": row.get("Team", "") or row.get("Nama Teknisi", "")
-                            }
-                        self.raw_rows.append(mapped)
-                self.filter_table()
-            except Exception as e:
-                QMessageBox.warning(self, "Error", f"Gagal memuat CSV:\n{self.csv_file}\n\n{e}")
-        else:
-            # kalau file tidak ada, jangan spam alert saat load pertama: cukup tunjukkan saat klik reload
-            pass
+    def report_jobs(self):
+        # file utama + file rotasi bulanan, sebagai job untuk load_report_files
+        return [(path, self.report_type) for path in rotated_report_files(self.csv_file)]
 
+    @METRICS.timed("load_reports")
+    def load_reports(self):
+        jobs = self.report_jobs()
+        self.apply_reports(load_report_files(jobs, REPORT_INDEX_DIR))
+
+    def apply_reports(self, results):
+        # buka file laporan (mmap + index) di thread utama setelah worker selesai
+        for rf in self.report_files:
+            rf.close()
+        self.report_files = []
+        errors = []
+        for path, index_path, error in results:
+            if not error:
+                try:
+                    rf = ReportFile(path, self.report_type, index_path)
+                    METRICS.incr("report_rows", len(rf))
+                    self.report_files.append(rf)
+                except Exception as e:
+                    error = str(e)
+            if error:
+                errors.append(f"{path}\n{error}")
+        self.update_status()
+        self.filter_table()
+        if errors:
+            QMessageBox.warning(self, "Error", "Gagal memuat CSV:\n" + "\n\n".join(errors))
+
+    def update_status(self):
+        # baris rusak tidak menggagalkan file: cukup tampilkan jumlah dan contohnya
+        damaged = [rf for rf in self.report_files if rf.errors]
+        total = sum(rf.errors.count for rf in damaged)
+        self.lbl_status.setText(f"{total} baris rusak dilewati" if total else "")
+        self.lbl_status.setToolTip("\n\n".join(
+            f"{os.path.basename(rf.csv_file)}:\n{rf.errors.summary()}" for rf in damaged))
+
+    @METRICS.timed("filter_table")
     def filter_table(self):
         keyword = self.search_field.text().strip().lower()
-        date_from = self.date_from.date()
-        date_to = self.date_to.date()
-        filtered = []
-        for r in self.raw_rows:
-            search_str = f"{r.get('Customer','')} {r.get('SN','')} {r.get('Team','')}".lower()
-            if keyword and keyword not in search_str:
-                continue
-            date_str = (r.get("Timestamp", "") or "")[:10].replace('/', '-')
-            tgl_dt = QDate.fromString(date_str, "yyyy-MM-dd")
-            if not tgl_dt.isValid():
-                tgl_dt = QDate.fromString(date_str, "dd-MM-yyyy")
-            if not tgl_dt.isValid():
-                # jika timestamp tidak dapat diparse, masukkan ke hasil agar tidak hilang
-                filtered.append(r)
-                continue
-            if tgl_dt < date_from or tgl_dt > date_to:
-                continue
-            filtered.append(r)
-        self.populate_table(filtered)
-
-    def populate_table(self, rows):
-        self.tbl.setRowCount(0)
-        for row_data in rows:
-            row = self.tbl.rowCount()
-            self.tbl.insertRow(row)
-            for i, col in enumerate(self.columns):
-                val = row_data.get(col, "")
-                item = QTableWidgetItem(val)
-                item.setFlags(item.flags() ^ Qt.ItemIsEditable)
-                self.tbl.setItem(row, i, item)
+        date_from = int(self.date_from.date().toString("yyyyMMdd"))
+        date_to = int(self.date_to.date().toString("yyyyMMdd"))
+        refs = []
+        # hanya baris dalam rentang tanggal (dan yang tanggalnya tidak bisa diparse) yang dibaca
+        for rf in self.report_files:
+            for i in rf.rows_in_date_range(date_from, date_to):
+                if keyword:
+                    r = rf.row(i)
+                    if keyword not in f"{r[2]} {r[3]} {r[4]}".lower():
+                        continue
+                refs.append((rf, i))
+        METRICS.incr("rows_rendered.laporan", len(refs))
+        self.model.set_rows(refs)
+
+    def row_count(self):
+        return sum(len(rf) for rf in self.report_files)
 
     def export_csv(self):
-        if not self.raw_rows:
+        if not self.row_count():
             QMessageBox.information(self, "Info", "Tidak ada data untuk diekspor.")
             return
         filename, _ = QFileDialog.getSaveFileName(
@@ -304,19 +802,16 @@ class TelegramReportTab(QWidget):
                 with open(filename, 'w', newline='', encoding="utf-8") as f:
                     writer = csv.writer(f)
                     writer.writerow(self.columns)
-                    for r in self.raw_rows:
-                        writer.writerow([r.get(col, "") for col in self.columns])
+                    for rf in self.report_files:
+                        for i in range(len(rf)):
+                            writer.writerow(rf.row(i))
                 QMessageBox.information(self, "Berhasil", f"Berhasil menyimpan ke {filename}")
             except Exception as e:
                 QMessageBox.warning(self, "Gagal", f"Gagal menyimpan CSV:\n{e}")
 
-    def get_all_sn(self):
-        sn_set = set()
-        for r in getattr(self, "raw_rows", []):
-            sn = r.get("SN", "")
-            if sn:
-                sn_set.add(sn.strip())
-        return sn_set
+    def has_sn(self, sn):
+        # cek lewat index hash SN, tanpa memuat seluruh laporan
+        return any(rf.has_sn(sn) for rf in self.report_files)
 
 class FormPengambilan(QWidget):
     def __init__(self, main):
@@ -364,10 +859,33 @@ class FormPengambilan(QWidget):
         self.grp_ont = QGroupBox("SN ONT")
         ont_layout = QVBoxLayout()
         self.grp_ont.setLayout(ont_layout)
+        # Mode scan: satu input untuk burst barcode scanner (diakhiri Enter)
+        scan_row = QHBoxLayout()
+        self.scan_input = QLineEdit()
+        self.scan_input.setPlaceholderText("Mode scan: arahkan scanner ke sini, SN otomatis masuk antrian")
+        self.scan_input.returnPressed.connect(self.on_scan)
+        scan_row.addWidget(QLabel("📷"))
+        scan_row.addWidget(self.scan_input)
+        btn_scan_del = QPushButton("Hapus SN Terpilih")
+        btn_scan_del.clicked.connect(self.remove_selected_scans)
+        scan_row.addWidget(btn_scan_del)
+        ont_layout.addLayout(scan_row)
+        self.lbl_scan = QLabel("Antrian scan: 0 SN")
+        ont_layout.addWidget(self.lbl_scan)
+        lists_row = QHBoxLayout()
+        self.scan_model = QStringListModel(self)
+        self.scan_set = set()
+        self.scan_list = QListView()
+        self.scan_list.setModel(self.scan_model)
+        self.scan_list.setEditTriggers(QListView.NoEditTriggers)
+        self.scan_list.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.scan_list.setUniformItemSizes(True)
+        lists_row.addWidget(self.scan_list)
         self.tbl_ont = QTableWidget(0, 1)
         self.tbl_ont.setHorizontalHeaderLabels(["Serial Number"])
         self.tbl_ont.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        ont_layout.addWidget(self.tbl_ont)
+        lists_row.addWidget(self.tbl_ont)
+        ont_layout.addLayout(lists_row)
         btn_row2 = QHBoxLayout()
         btn_ont_add = QPushButton("Tambah Data")
         btn_ont_add.clicked.connect(self.add_ont_row)
@@ -392,44 +910,137 @@ class FormPengambilan(QWidget):
         button_layout.addWidget(self.btn_submit, alignment=Qt.AlignRight)
         self.layout.addLayout(button_layout)
 
+        attach_completion(self.cmb_divisi, self.main.idx_divisi)
+        attach_completion(self.cmb_tim, self.main.idx_tim)
         self.reload_options()
 
-    def create_completer_for(self, combo: QComboBox):
-        # QCompleter dari daftar items, supaya pencarian lebih nyaman
-        comp = QCompleter(combo.model(), combo)
-        comp.setCompletionMode(QCompleter.PopupCompletion)
-        comp.setCaseSensitivity(Qt.CaseInsensitive)
-        combo.setCompleter(comp)
+        # draft form disimpan otomatis (debounce) supaya input tidak hilang jika aplikasi tertutup
+        self.draft_timer = QTimer(self)
+        self.draft_timer.setSingleShot(True)
+        self.draft_timer.setInterval(1000)
+        self.draft_timer.timeout.connect(self.save_draft)
+        self.cmb_divisi.editTextChanged.connect(self.schedule_draft)
+        self.cmb_tim.editTextChanged.connect(self.schedule_draft)
+        self.scan_model.rowsInserted.connect(self.schedule_draft)
+        self.scan_model.rowsRemoved.connect(self.schedule_draft)
+        self.scan_model.modelReset.connect(self.schedule_draft)
+        self.restore_draft(load_json(DRAFT_FILE, None))
 
     def reload_options(self):
-        # Divisi & Tim
-        self.cmb_divisi.clear()
-        self.cmb_divisi.addItems(DIVISI)
-        if LAST_SELECTION.get("divisi"):
+        # Divisi & Tim (model combo dibagi lewat CompletionIndex, tidak perlu diisi ulang).
+        # Pilihan yang sedang diketik user tidak ditimpa, begitu juga isi tabel input:
+        # reload_all juga dipanggil setelah sync/undo saat form mungkin sedang diisi.
+        if LAST_SELECTION.get("divisi") and not self.cmb_divisi.currentText().strip():
             idx = self.cmb_divisi.findText(LAST_SELECTION["divisi"])
             if idx >= 0:
                 self.cmb_divisi.setCurrentIndex(idx)
             else:
                 self.cmb_divisi.setEditText(LAST_SELECTION["divisi"])
-        self.create_completer_for(self.cmb_divisi)
 
-        self.cmb_tim.clear()
-        self.cmb_tim.addItems(TIM)
-        if LAST_SELECTION.get("tim"):
+        if LAST_SELECTION.get("tim") and not self.cmb_tim.currentText().strip():
             idx = self.cmb_tim.findText(LAST_SELECTION["tim"])
             if idx >= 0:
                 self.cmb_tim.setCurrentIndex(idx)
             else:
                 self.cmb_tim.setEditText(LAST_SELECTION["tim"])
-        self.create_completer_for(self.cmb_tim)
-
-        # Reset tabel input
-        self.tbl_kabel.setRowCount(0)
-        self.tbl_ont.setRowCount(0)
 
     def clear_form(self):
         self.tbl_kabel.setRowCount(0)
         self.tbl_ont.setRowCount(0)
+        self.clear_scans()
+        self.draft_timer.stop()
+        PERSIST.remove(DRAFT_FILE)
+
+    def schedule_draft(self, *args):
+        self.draft_timer.start()
+
+    def draft_state(self):
+        kabel = []
+        for row in range(self.tbl_kabel.rowCount()):
+            cmb, spin = self.tbl_kabel.cellWidget(row, 0), self.tbl_kabel.cellWidget(row, 1)
+            if cmb and spin:
+                kabel.append([cmb.currentText(), spin.value()])
+        ont = []
+        for row in range(self.tbl_ont.rowCount()):
+            line = self.tbl_ont.cellWidget(row, 0)
+            if line:
+                ont.append(line.text())
+        return {
+            "divisi": self.cmb_divisi.currentText(),
+            "tim": self.cmb_tim.currentText(),
+            "kabel": kabel,
+            "ont": ont,
+            "scan": self.scan_model.stringList(),
+        }
+
+    def save_draft(self):
+        state = self.draft_state()
+        if state["kabel"] or state["ont"] or state["scan"]:
+            PERSIST.write(DRAFT_FILE, state)
+        else:
+            PERSIST.remove(DRAFT_FILE)
+
+    def restore_draft(self, draft):
+        if not draft or not (draft.get("kabel") or draft.get("ont") or draft.get("scan")):
+            return
+        if draft.get("divisi"):
+            self.cmb_divisi.setEditText(draft["divisi"])
+        if draft.get("tim"):
+            self.cmb_tim.setEditText(draft["tim"])
+        for name, qty in draft.get("kabel", []):
+            self.add_kabel_row()
+            row = self.tbl_kabel.rowCount() - 1
+            self.tbl_kabel.cellWidget(row, 0).setEditText(name)
+            self.tbl_kabel.cellWidget(row, 1).setValue(qty)
+        for sn in draft.get("ont", []):
+            self.add_ont_row()
+            self.tbl_ont.cellWidget(self.tbl_ont.rowCount() - 1, 0).setText(sn)
+        scans = draft.get("scan", [])
+        self.scan_model.setStringList(scans)
+        self.scan_set = set(scans)
+        self.set_scan_status(f"Draft sebelumnya dipulihkan (antrian scan: {len(scans)} SN)")
+        self.draft_timer.stop()
+
+    def set_scan_status(self, text, ok=True):
+        self.lbl_scan.setText(text)
+        self.lbl_scan.setStyleSheet("" if ok else "color:#f44336;")
+
+    def on_scan(self):
+        sn = self.scan_input.text().strip()
+        self.scan_input.clear()
+        if not sn:
+            return
+        # validasi O(1): antrian saat ini + index SN histori
+        if sn in self.scan_set:
+            QApplication.beep()
+            self.set_scan_status(f"SN {sn} sudah ada di antrian ({len(self.scan_set)} SN)", ok=False)
+            return
+        if sn in self.main.idx_sn:
+            QApplication.beep()
+            self.set_scan_status(f"SN {sn} sudah tercatat di histori ONT ({len(self.scan_set)} SN)", ok=False)
+            return
+        if ARCHIVE.has_sn(sn):
+            QApplication.beep()
+            self.set_scan_status(f"SN {sn} sudah tercatat di arsip histori ONT ({len(self.scan_set)} SN)", ok=False)
+            return
+        row = self.scan_model.rowCount()
+        self.scan_model.insertRows(row, 1)
+        self.scan_model.setData(self.scan_model.index(row, 0), sn)
+        self.scan_set.add(sn)
+        self.scan_list.scrollToBottom()
+        self.set_scan_status(f"Antrian scan: {len(self.scan_set)} SN (terakhir: {sn})")
+
+    def remove_selected_scans(self):
+        rows = sorted((idx.row() for idx in self.scan_list.selectionModel().selectedIndexes()), reverse=True)
+        for row in rows:
+            self.scan_set.discard(self.scan_model.index(row, 0).data())
+            self.scan_model.removeRows(row, 1)
+        self.set_scan_status(f"Antrian scan: {len(self.scan_set)} SN")
+
+    def clear_scans(self):
+        self.scan_model.setStringList([])
+        self.scan_set.clear()
+        self.set_scan_status("Antrian scan: 0 SN")
 
     def add_kabel_row(self):
         row = self.tbl_kabel.rowCount()
@@ -437,22 +1048,23 @@ class FormPengambilan(QWidget):
         cmb = QComboBox()
         cmb.setEditable(True)
         cmb.setInsertPolicy(QComboBox.NoInsert)
-        cmb.addItems(MATERIAL + AKSESORI)
-        # set completer
-        comp = QCompleter([*MATERIAL, *AKSESORI], self)
-        comp.setCaseSensitivity(Qt.CaseInsensitive)
-        cmb.setCompleter(comp)
+        attach_completion(cmb, self.main.idx_item)
+        cmb.editTextChanged.connect(self.schedule_draft)
         self.tbl_kabel.setCellWidget(row, 0, cmb)
         spin = QSpinBox()
         spin.setRange(1, 1000)
+        spin.valueChanged.connect(self.schedule_draft)
         self.tbl_kabel.setCellWidget(row, 1, spin)
+        self.schedule_draft()
 
     def add_ont_row(self):
         row = self.tbl_ont.rowCount()
         self.tbl_ont.insertRow(row)
         line = QLineEdit()
         line.setPlaceholderText("Scan/masukkan serial number ONT")
+        line.textChanged.connect(self.schedule_draft)
         self.tbl_ont.setCellWidget(row, 0, line)
+        self.schedule_draft()
 
     def import_ont_csv(self):
         filename, _ = QFileDialog.getOpenFileName(self, "Pilih file CSV SN ONT untuk diimport", os.path.expanduser("~"), "CSV Files (*.csv);;All Files (*)")
@@ -460,35 +1072,38 @@ class FormPengambilan(QWidget):
             return
         try:
             added = 0
-            with open(filename, newline='', encoding="utf-8") as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    # coba ambil kolom SN atau Serial Number
-                    sn = row.get("SN") or row.get("Serial Number") or row.get("sn") or row.get("serial_number") or ""
-                    if not sn:
-                        # jika baris tidak punya kolom SN, coba gabungkan semua kolom dan skip jika tidak ada
-                        continue
-                    tgl = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    entry = {
-                        "tanggal": tgl,
-                        "sn": str(sn).strip(),
-                        "tim": LAST_SELECTION.get("tim", ""),
-                        "divisi": LAST_SELECTION.get("divisi", "")
-                    }
-                    HISTORI_ONT.append(entry)
-                    added += 1
+            new_entries = []
+            errors = RowErrors()
+            # encoding/BOM/delimiter dideteksi otomatis; baris rusak dicatat, bukan menggagalkan import
+            for line, row in read_dicts(filename, errors):
+                # coba ambil kolom SN atau Serial Number
+                sn = (row.get("SN") or row.get("Serial Number") or row.get("sn") or row.get("serial_number") or "").strip()
+                if not sn:
+                    errors.add(line, "SN kosong")
+                    continue
+                tgl = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                entry = {
+                    "tanggal": tgl,
+                    "sn": sn,
+                    "tim": LAST_SELECTION.get("tim", ""),
+                    "divisi": LAST_SELECTION.get("divisi", "")
+                }
+                new_entries.append(entry)
+                added += 1
             if added > 0:
-                save_json("histori_ont.json", HISTORI_ONT)
-                QMessageBox.information(self, "Import Selesai", f"Berhasil menambahkan {added} SN dari {filename}")
+                self.main.commands.execute("import", f"Import {added} SN ONT", [journal.add("ont", new_entries)])
+                QMessageBox.information(self, "Import Selesai", f"Berhasil menambahkan {added} SN dari {filename}" + skipped_rows_text(errors))
                 self.main.reload_all()
             else:
-                QMessageBox.information(self, "Import", "Tidak ada SN ditemukan di file.")
+                QMessageBox.information(self, "Import", "Tidak ada SN ditemukan di file." + skipped_rows_text(errors))
         except Exception as e:
             QMessageBox.warning(self, "Gagal Import", f"Gagal mengimpor CSV:\n{e}")
 
+    @METRICS.timed("submit")
     def submit(self):
-        divisi = self.cmb_divisi.currentText().strip()
-        tim = self.cmb_tim.currentText().strip()
+        # ejaan yang sudah terdaftar (beda kapital/spasi) dipakai ulang
+        divisi = DIVISI.resolve(self.cmb_divisi.currentText())
+        tim = TIM.resolve(self.cmb_tim.currentText())
         tgl = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
         mat_entries = []
@@ -496,7 +1111,7 @@ class FormPengambilan(QWidget):
             widget_mat = self.tbl_kabel.cellWidget(row, 0)
             widget_qty = self.tbl_kabel.cellWidget(row, 1)
             if widget_mat and widget_qty:
-                nama = widget_mat.currentText().strip()
+                nama = MASTER.resolve_item(widget_mat.currentText())
                 try:
                     qty = int(widget_qty.value())
                 except Exception:
@@ -522,34 +1137,41 @@ class FormPengambilan(QWidget):
                         "tim": tim,
                         "divisi": divisi
                     })
+        # antrian mode scan ikut disimpan dalam satu kali tulis
+        for sn in self.scan_model.stringList():
+            ont_entries.append({
+                "tanggal": tgl,
+                "sn": sn,
+                "tim": tim,
+                "divisi": divisi
+            })
 
         if not mat_entries and not ont_entries:
             QMessageBox.warning(self, "Validasi Gagal", "Masukkan minimal satu data material/ONT!")
             return
 
-        global HISTORI_MAT, HISTORI_ONT, LAST_SELECTION
-        if mat_entries:
-            HISTORI_MAT += mat_entries
-            save_json("histori_kabel_aksesori.json", HISTORI_MAT)
-        if ont_entries:
-            HISTORI_ONT += ont_entries
-            save_json("histori_ont.json", HISTORI_ONT)
+        global LAST_SELECTION
+        for e in mat_entries:
+            self.main.idx_item.bump(e["deskripsi"])
+        self.main.idx_divisi.bump(divisi)
+        self.main.idx_tim.bump(tim)
+        self.main.commands.execute("submit", f"Pengambilan {tim or divisi}".strip(), [
+            journal.add("mat", mat_entries),
+            journal.add("ont", ont_entries),
+        ])
 
         # Simpan pilihan terakhir
         LAST_SELECTION["divisi"] = divisi
         LAST_SELECTION["tim"] = tim
-        save_json("last_selection.json", LAST_SELECTION)
+        PERSIST.write("last_selection.json", LAST_SELECTION)
 
-        # Jika divisi atau tim baru, tambahkan ke list dan simpan pengaturan
-        if divisi and divisi not in DIVISI:
-            DIVISI.append(divisi)
-            save_json("divisi.json", DIVISI)
-        if tim and tim not in TIM:
-            TIM.append(tim)
-            save_json("tim.json", TIM)
+        # divisi/tim baru didaftarkan; file pengaturan hanya ditulis jika ada yang baru
+        DIVISI.add(divisi)
+        TIM.add(tim)
+        MASTER.save()
 
         QMessageBox.information(self, "Berhasil", "Data berhasil disimpan.")
-        self.main.reload_all()
+        self.main.refresh_history()
         self.clear_form()
 
 class Resume(QWidget):
@@ -570,6 +1192,10 @@ class Resume(QWidget):
         self.init_stock_tab()
         self.init_kabel_tab()
         self.init_ont_tab()
+        self.taken_raw = Counter()
+        self.count_taken("mat", HISTORI_MAT)
+        # store histori mengikuti setiap perubahan command log (submit, hapus, undo/redo, sync)
+        self.main.commands.observers += [self.kabel_store.apply, self.ont_store.apply, self.count_taken]
         self.reload_data()
 
     def init_stock_tab(self):
@@ -580,11 +1206,7 @@ class Resume(QWidget):
         self.stock_desc = QComboBox()
         self.stock_desc.setEditable(True)
         self.stock_desc.setInsertPolicy(QComboBox.NoInsert)
-        self.stock_desc.addItems(MATERIAL + AKSESORI)
-        # completer
-        comp = QCompleter(MATERIAL + AKSESORI, self)
-        comp.setCaseSensitivity(Qt.CaseInsensitive)
-        self.stock_desc.setCompleter(comp)
+        attach_completion(self.stock_desc, self.main.idx_item)
 
         self.stock_qty = QSpinBox()
         self.stock_qty.setRange(1, 10000)
@@ -598,6 +1220,23 @@ class Resume(QWidget):
         form_layout.addWidget(self.btn_stock_add)
         stock_layout.addWidget(form_grp)
 
+        # perkiraan stock habis dari laju pengambilan (lihat forecast.py)
+        forecast_grp = QGroupBox("Perkiraan Stock")
+        forecast_layout = QVBoxLayout()
+        forecast_grp.setLayout(forecast_layout)
+        self.lbl_stock_warning = QLabel()
+        self.lbl_stock_warning.setWordWrap(True)
+        self.lbl_stock_warning.setStyleSheet("color:#f44336;font-weight:bold;")
+        forecast_layout.addWidget(self.lbl_stock_warning)
+        self.tbl_forecast = QTableWidget(0, 5)
+        self.tbl_forecast.setHorizontalHeaderLabels(["Nama Item", "Sisa", "Ambil/Hari", "Perkiraan Habis", "Status"])
+        self.tbl_forecast.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.tbl_forecast.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.tbl_forecast.verticalHeader().hide()
+        self.tbl_forecast.setMaximumHeight(160)
+        forecast_layout.addWidget(self.tbl_forecast)
+        stock_layout.addWidget(forecast_grp)
+
         self.tbl_stock = QTableWidget()
         self.tbl_stock.setColumnCount(7)
         self.tbl_stock.setHorizontalHeaderLabels([
@@ -618,9 +1257,23 @@ class Resume(QWidget):
         search_row.addWidget(QLabel("🔍"))
         search_row.addWidget(self.search_kabel)
         kabel_layout.addLayout(search_row)
-        self.tbl_kabel = QTableWidget()
-        self.tbl_kabel.setColumnCount(6)
-        self.tbl_kabel.setHorizontalHeaderLabels(["No", "Tanggal", "Deskripsi", "Qty", "Nama Tim", "Aksi"])
+        self.kabel_filter = HistoryFilterBar(self.main.idx_tim, self.main.idx_divisi)
+        self.kabel_filter.changed.connect(self.filter_kabel)
+        kabel_layout.addWidget(self.kabel_filter)
+        # histori ditampilkan berhalaman, terbaru di atas
+        self.kabel_store = HistoryStore(HISTORI_MAT, "mat", tim_key=TIM.key, divisi_key=DIVISI.key)
+        self.kabel_columns = [
+            ("Tanggal", lambda e: e["tanggal"], None),
+            ("Deskripsi", lambda e: e["deskripsi"], None),
+            ("Qty", lambda e: str(e["qty"]), None),
+            ("Nama Tim", lambda e: e.get("tim", ""), None),
+        ]
+        self.kabel_model = HistoryTableModel(self.kabel_store, self.kabel_columns)
+        self.tbl_kabel = QTableView()
+        self.tbl_kabel.setModel(self.kabel_model)
+        self.tbl_kabel.verticalHeader().hide()
+        self.tbl_kabel.setEditTriggers(QTableView.NoEditTriggers)
+        self.tbl_kabel.clicked.connect(self.on_kabel_clicked)
         self.tbl_kabel.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeToContents)
         for i in range(1, 6):
             self.tbl_kabel.horizontalHeader().setSectionResizeMode(i, QHeaderView.Stretch)
@@ -633,6 +1286,11 @@ class Resume(QWidget):
         btn_row.addWidget(self.btn_import_kabel)
         btn_row.addWidget(self.btn_download_kabel)
         btn_row.addStretch()
+        self.lbl_arsip_kabel = QLabel()
+        self.btn_arsip_kabel = QPushButton("Lihat Arsip...")
+        self.btn_arsip_kabel.clicked.connect(self.open_archive_kabel)
+        btn_row.addWidget(self.lbl_arsip_kabel)
+        btn_row.addWidget(self.btn_arsip_kabel)
         kabel_layout.addLayout(btn_row)
 
     def init_ont_tab(self):
@@ -641,12 +1299,29 @@ class Resume(QWidget):
         self.search_ont = QLineEdit()
         self.search_ont.setPlaceholderText("Cari serial number atau tim...")
         self.search_ont.textChanged.connect(self.filter_ont)
+        self.search_ont.setCompleter(FuzzyCompleter(self.main.idx_sn, self.search_ont))
         search_row.addWidget(QLabel("🔍"))
         search_row.addWidget(self.search_ont)
         ont_layout.addLayout(search_row)
-        self.tbl_ont = QTableWidget()
-        self.tbl_ont.setColumnCount(6)
-        self.tbl_ont.setHorizontalHeaderLabels(["No", "Tanggal", "Serial Number", "Nama Tim", "Status", "Aksi"])
+        self.ont_filter = HistoryFilterBar(self.main.idx_tim, self.main.idx_divisi)
+        self.ont_filter.changed.connect(self.filter_ont)
+        ont_layout.addWidget(self.ont_filter)
+        self.ont_status_cache = {}
+        self.ont_store = HistoryStore(HISTORI_ONT, "ont", tim_key=TIM.key, divisi_key=DIVISI.key)
+        self.ont_columns = [
+            ("Tanggal", lambda e: e["tanggal"], None),
+            ("Serial Number", lambda e: e["sn"], None),
+            ("Nama Tim", lambda e: e.get("tim", ""), None),
+            # warna status: hijau untuk terpakai, merah untuk kosong
+            ("Status", lambda e: self.ont_status(e["sn"]),
+             lambda e: "green" if self.ont_status(e["sn"]) == "Terpakai" else "red"),
+        ]
+        self.ont_model = HistoryTableModel(self.ont_store, self.ont_columns)
+        self.tbl_ont = QTableView()
+        self.tbl_ont.setModel(self.ont_model)
+        self.tbl_ont.verticalHeader().hide()
+        self.tbl_ont.setEditTriggers(QTableView.NoEditTriggers)
+        self.tbl_ont.clicked.connect(self.on_ont_clicked)
         self.tbl_ont.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeToContents)
         for i in range(1, 6):
             self.tbl_ont.horizontalHeader().setSectionResizeMode(i, QHeaderView.Stretch)
@@ -659,15 +1334,42 @@ class Resume(QWidget):
         btn_row.addWidget(self.btn_import_ont)
         btn_row.addWidget(self.btn_download_ont)
         btn_row.addStretch()
+        self.lbl_arsip_ont = QLabel()
+        self.btn_arsip_ont = QPushButton("Lihat Arsip...")
+        self.btn_arsip_ont.clicked.connect(self.open_archive_ont)
+        btn_row.addWidget(self.lbl_arsip_ont)
+        btn_row.addWidget(self.btn_arsip_ont)
         ont_layout.addLayout(btn_row)
 
+    def show_forecast(self):
+        rows = self.main.forecaster.forecast()
+        warnings = [r for r in rows if r["status"] != "Aman"]
+        self.lbl_stock_warning.setText(
+            f"⚠ {len(warnings)} item menipis/habis: " + ", ".join(r["item"] for r in warnings[:10])
+            if warnings else "")
+        self.lbl_stock_warning.setVisible(bool(warnings))
+        colors = {"Habis": "red", "Menipis": "#FF9800", "Aman": "green"}
+        self.tbl_forecast.setRowCount(len(rows))
+        for row, r in enumerate(rows):
+            hari = f"{r['hari']:.1f} hari" if r["hari"] is not None else "-"
+            values = [r["item"], str(r["sisa"]), f"{r['laju']:.2f}", hari, r["status"]]
+            for col, value in enumerate(values):
+                self.tbl_forecast.setItem(row, col, QTableWidgetItem(value))
+            self.tbl_forecast.item(row, 4).setForeground(QColor(colors[r["status"]]))
+
+    @METRICS.timed("show_stock")
     def show_stock(self):
+        self.show_forecast()
         self.tbl_stock.setRowCount(0)
-        # hitung jumlah diambil per item per tanggal
-        taken_per_item = {}
-        for entry in HISTORI_MAT:
-            key = (entry['deskripsi'], entry['tanggal'][:10])
-            taken_per_item[key] = taken_per_item.get(key, 0) + int(entry.get('qty', 0))
+        # jumlah diambil per item per tanggal; ejaan berbeda digabung di sini supaya
+        # perubahan master/alias langsung berlaku tanpa menghitung ulang histori
+        taken_per_item = Counter()
+        item_keys = {}
+        for (nama, tanggal), qty in self.taken_raw.items():
+            key = item_keys.get(nama)
+            if key is None:
+                key = item_keys[nama] = MASTER.item_key(nama)
+            taken_per_item[key, tanggal] += qty
 
         for i, entry in enumerate(STOCK_ENTRIES):
             row = self.tbl_stock.rowCount()
@@ -677,7 +1379,7 @@ class Resume(QWidget):
             self.tbl_stock.setItem(row, 1, QTableWidgetItem(entry["tanggal"]))
             self.tbl_stock.setItem(row, 2, QTableWidgetItem(entry["deskripsi"]))
             self.tbl_stock.setItem(row, 3, QTableWidgetItem(str(entry["qty"])))
-            key = (entry["deskripsi"], entry["tanggal"][:10])
+            key = (MASTER.item_key(entry["deskripsi"]), entry["tanggal"][:10])
             diambil = taken_per_item.get(key, 0)
             self.tbl_stock.setItem(row, 4, QTableWidgetItem(str(diambil)))
             stock_awal = int(entry["qty"]) - diambil
@@ -688,49 +1390,68 @@ class Resume(QWidget):
             btn_del.clicked.connect(lambda _, idx=i: self.hapus_stock(idx))
             self.tbl_stock.setCellWidget(row, 6, btn_del)
 
-    def show_kabel(self, filter_txt=""):
-        self.tbl_kabel.setRowCount(0)
-        for i, entry in enumerate(HISTORI_MAT):
-            if filter_txt and (filter_txt.lower() not in entry["deskripsi"].lower() and filter_txt.lower() not in entry["tim"].lower()):
-                continue
-            row = self.tbl_kabel.rowCount()
-            self.tbl_kabel.insertRow(row)
-            self.tbl_kabel.setItem(row, 0, QTableWidgetItem(str(row + 1)))
-            self.tbl_kabel.setItem(row, 1, QTableWidgetItem(entry["tanggal"]))
-            self.tbl_kabel.setItem(row, 2, QTableWidgetItem(entry["deskripsi"]))
-            self.tbl_kabel.setItem(row, 3, QTableWidgetItem(str(entry["qty"])))
-            self.tbl_kabel.setItem(row, 4, QTableWidgetItem(entry["tim"]))
-            btn_del = QPushButton("🗑")
-            btn_del.setFixedSize(22, 22)
-            btn_del.setStyleSheet("font-size:12px;min-width:20px;max-width:22px;background:#f44336;color:white;")
-            btn_del.clicked.connect(lambda _, idx=i: self.hapus_kabel(idx))
-            self.tbl_kabel.setCellWidget(row, 5, btn_del)
+    def count_taken(self, coll, entries, sign=1):
+        # observer command log: jumlah diambil per (nama apa adanya, tanggal)
+        if coll != "mat":
+            return
+        for entry in entries:
+            self.taken_raw[entry['deskripsi'], entry['tanggal'][:10]] += int(entry.get('qty', 0)) * sign
 
+    @METRICS.timed("show_kabel")
+    def show_kabel(self, filter_txt=""):
+        args = self.kabel_filter.query_args()
+        predicate = self.text_predicate(filter_txt, "deskripsi")
+        self.kabel_model.reset(self.kabel_store.query(predicate=predicate, **args))
+        self.update_archive_info(self.lbl_arsip_kabel, self.btn_arsip_kabel, "mat", args)
+
+    @staticmethod
+    def text_predicate(filter_txt, field):
+        txt = filter_txt.lower()
+        if not txt:
+            return None
+        return lambda e: txt in e[field].lower() or txt in e["tim"].lower()
+
+    def update_archive_info(self, label, button, coll, args):
+        # cukup dari ringkasan index; arsip baru didekompresi jika dibuka
+        count = ARCHIVE.count(coll, args.get("date_from"), args.get("date_to"),
+                              args.get("tim"), args.get("divisi"), TIM.key, DIVISI.key)
+        label.setText(f"+{count} entri di arsip")
+        label.setVisible(count > 0)
+        button.setVisible(count > 0)
+
+    def open_archive_kabel(self):
+        ArchiveDialog("mat", "Material", self.kabel_columns, self.kabel_filter.query_args(),
+                      self.text_predicate(self.search_kabel.text(), "deskripsi"), self).exec()
+
+    def open_archive_ont(self):
+        ArchiveDialog("ont", "ONT", self.ont_columns, self.ont_filter.query_args(),
+                      self.text_predicate(self.search_ont.text(), "sn"), self).exec()
+
+    def on_kabel_clicked(self, index):
+        if index.column() == self.kabel_model.columnCount() - 1:
+            self.hapus_kabel(self.kabel_model.entry(index.row()))
+
+    def is_sn_terpakai(self, sn):
+        return any(tab.has_sn(sn) for tab in self.laporan_tabs)
+
+    def ont_status(self, sn):
+        # status dihitung saat baris tampil saja, lalu di-cache
+        status = self.ont_status_cache.get(sn)
+        if status is None:
+            status = "Terpakai" if self.is_sn_terpakai(sn) else "Kosong"
+            self.ont_status_cache[sn] = status
+        return status
+
+    @METRICS.timed("show_ont")
     def show_ont(self, filter_txt=""):
-        telegram_sn_set = set()
-        for tab in self.laporan_tabs:
-            telegram_sn_set.update(tab.get_all_sn())
-        self.tbl_ont.setRowCount(0)
-        for i, entry in enumerate(HISTORI_ONT):
-            if filter_txt and (filter_txt.lower() not in entry["sn"].lower() and filter_txt.lower() not in entry["tim"].lower()):
-                continue
-            row = self.tbl_ont.rowCount()
-            self.tbl_ont.insertRow(row)
-            self.tbl_ont.setItem(row, 0, QTableWidgetItem(str(row + 1)))
-            self.tbl_ont.setItem(row, 1, QTableWidgetItem(entry["tanggal"]))
-            self.tbl_ont.setItem(row, 2, QTableWidgetItem(entry["sn"]))
-            self.tbl_ont.setItem(row, 3, QTableWidgetItem(entry["tim"]))
-            status = "Terpakai" if entry["sn"] in telegram_sn_set else "Kosong"
-            status_item = QTableWidgetItem(status)
-            # warna status: hijau untuk terpakai, merah untuk kosong
-            from PySide6.QtGui import QColor
-            status_item.setForeground(QColor("green") if status == "Terpakai" else QColor("red"))
-            self.tbl_ont.setItem(row, 4, status_item)
-            btn_del = QPushButton("🗑")
-            btn_del.setFixedSize(22, 22)
-            btn_del.setStyleSheet("font-size:12px;min-width:20px;max-width:22px;background:#f44336;color:white;")
-            btn_del.clicked.connect(lambda _, idx=i: self.hapus_ont(idx))
-            self.tbl_ont.setCellWidget(row, 5, btn_del)
+        self.ont_status_cache.clear()
+        args = self.ont_filter.query_args()
+        self.ont_model.reset(self.ont_store.query(predicate=self.text_predicate(filter_txt, "sn"), **args))
+        self.update_archive_info(self.lbl_arsip_ont, self.btn_arsip_ont, "ont", args)
+
+    def on_ont_clicked(self, index):
+        if index.column() == self.ont_model.columnCount() - 1:
+            self.hapus_ont(self.ont_model.entry(index.row()))
 
     def filter_kabel(self):
         txt = self.search_kabel.text()
@@ -740,47 +1461,43 @@ class Resume(QWidget):
         txt = self.search_ont.text()
         self.show_ont(txt)
 
-    def hapus_kabel(self, idx):
-        global HISTORI_MAT
-        if 0 <= idx < len(HISTORI_MAT):
-            del HISTORI_MAT[idx]
-            save_json("histori_kabel_aksesori.json", HISTORI_MAT)
+    def hapus_kabel(self, entry):
+        if entry is not None:
+            # index hanya petunjuk posisi; command log mencocokkan entri lewat id
+            idx = position_of(HISTORI_MAT, entry)
+            self.main.commands.execute("delete", f"Hapus {entry['deskripsi']}", [journal.remove("mat", idx, entry)])
             self.reload_data()
 
-    def hapus_ont(self, idx):
-        global HISTORI_ONT
-        if 0 <= idx < len(HISTORI_ONT):
-            del HISTORI_ONT[idx]
-            save_json("histori_ont.json", HISTORI_ONT)
+    def hapus_ont(self, entry):
+        if entry is not None:
+            idx = position_of(HISTORI_ONT, entry)
+            self.main.commands.execute("delete", f"Hapus SN {entry['sn']}", [journal.remove("ont", idx, entry)])
             self.reload_data()
 
     def add_stock(self):
-        desc = self.stock_desc.currentText().strip()
+        desc = MASTER.resolve_item(self.stock_desc.currentText())
         qty = self.stock_qty.value()
         tgl = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         if not desc or qty <= 0:
             QMessageBox.warning(self, "Validasi", "Isi nama item dan qty dengan benar.")
             return
-        global STOCK_ENTRIES
-        STOCK_ENTRIES.append({
+        self.main.commands.execute("stock", f"Stock masuk {desc}", [journal.add("stock", [{
             "tanggal": tgl,
             "deskripsi": desc,
             "qty": qty
-        })
-        save_json("stock_entries.json", STOCK_ENTRIES)
-        # jika item baru, tambahkan ke MATERIAL/AKSESORI (sederhana: tambahkan ke MATERIAL)
-        if desc not in MATERIAL and desc not in AKSESORI:
-            MATERIAL.append(desc)
-            save_json("material.json", MATERIAL)
+        }])])
+        # item baru didaftarkan ke MATERIAL (jika belum ada di material/aksesori)
+        MASTER.add_item(desc)
+        MASTER.save()
+        self.main.idx_item.add(desc)
         self.show_stock()
         self.stock_qty.setValue(1)
         QMessageBox.information(self, "Berhasil", "Stock berhasil ditambahkan.")
 
     def hapus_stock(self, idx):
-        global STOCK_ENTRIES
         if 0 <= idx < len(STOCK_ENTRIES):
-            del STOCK_ENTRIES[idx]
-            save_json("stock_entries.json", STOCK_ENTRIES)
+            entry = STOCK_ENTRIES[idx]
+            self.main.commands.execute("delete", f"Hapus stock {entry['deskripsi']}", [journal.remove("stock", idx, entry)])
             self.show_stock()
 
     def download_kabel(self):
@@ -811,11 +1528,8 @@ class Resume(QWidget):
                 with open(filename, "w", newline='', encoding="utf-8") as f:
                     writer = csv.writer(f)
                     writer.writerow(["Tanggal", "Serial Number", "Nama Tim", "Status"])
-                    telegram_sn_set = set()
-                    for tab in self.laporan_tabs:
-                        telegram_sn_set.update(tab.get_all_sn())
                     for entry in HISTORI_ONT:
-                        status = "Terpakai" if entry["sn"] in telegram_sn_set else "Kosong"
+                        status = "Terpakai" if self.is_sn_terpakai(entry["sn"]) else "Kosong"
                         writer.writerow([entry["tanggal"], entry["sn"], entry.get("tim",""), status])
                 QMessageBox.information(self, "Download Berhasil", f"Berhasil mengunduh ke {filename}")
             except Exception as e:
@@ -827,43 +1541,44 @@ class Resume(QWidget):
             return
         try:
             added = 0
-            with open(filename, newline='', encoding="utf-8") as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    # cari field yang mungkin mengindikasikan material
-                    desc = row.get("Deskripsi") or row.get("deskripsi") or row.get("Nama Item") or row.get("Item") or ""
-                    qty = row.get("Qty") or row.get("qty") or row.get("Jumlah") or row.get("jumlah") or "0"
-                    tim = row.get("Tim") or row.get("tim") or row.get("Nama Tim") or LAST_SELECTION.get("tim","")
-                    if not desc:
-                        # jika tidak dapat menemukan deskripsi, skip
-                        continue
-                    try:
-                        q = int(float(qty))
-                    except Exception:
-                        q = 0
-                    if q <= 0:
-                        # jika qty nol, skip
-                        continue
-                    entry = {
-                        "tanggal": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                        "deskripsi": desc.strip(),
-                        "qty": q,
-                        "tim": tim,
-                        "divisi": LAST_SELECTION.get("divisi","")
-                    }
-                    HISTORI_MAT.append(entry)
-                    added += 1
-                    # tambahkan ke master list jika belum ada
-                    if desc.strip() not in MATERIAL and desc.strip() not in AKSESORI:
-                        MATERIAL.append(desc.strip())
-                # selesai baca
+            new_entries = []
+            errors = RowErrors()
+            for line, row in read_dicts(filename, errors):
+                # cari field yang mungkin mengindikasikan material
+                desc = row.get("Deskripsi") or row.get("deskripsi") or row.get("Nama Item") or row.get("Item") or ""
+                qty = row.get("Qty") or row.get("qty") or row.get("Jumlah") or row.get("jumlah") or "0"
+                tim = row.get("Tim") or row.get("tim") or row.get("Nama Tim") or LAST_SELECTION.get("tim","")
+                if not desc.strip():
+                    errors.add(line, "deskripsi kosong")
+                    continue
+                try:
+                    q = int(float(qty.replace(",", ".")))
+                except ValueError:
+                    errors.add(line, f"qty tidak valid: {qty!r}")
+                    continue
+                if q <= 0:
+                    errors.add(line, "qty harus lebih dari 0")
+                    continue
+                # ejaan resmi dipakai; item baru didaftarkan ke master list (disimpan sekali di akhir)
+                desc = MASTER.add_item(desc)
+                entry = {
+                    "tanggal": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    "deskripsi": desc,
+                    "qty": q,
+                    "tim": tim,
+                    "divisi": LAST_SELECTION.get("divisi","")
+                }
+                new_entries.append(entry)
+                added += 1
+                self.main.idx_item.bump(desc)
+                self.main.idx_item.add(desc)
             if added > 0:
-                save_json("histori_kabel_aksesori.json", HISTORI_MAT)
-                save_json("material.json", MATERIAL)
-                QMessageBox.information(self, "Import Selesai", f"Berhasil menambahkan {added} entri material dari {filename}")
+                self.main.commands.execute("import", f"Import {added} material", [journal.add("mat", new_entries)])
+                MASTER.save()
+                QMessageBox.information(self, "Import Selesai", f"Berhasil menambahkan {added} entri material dari {filename}" + skipped_rows_text(errors))
                 self.reload_data()
             else:
-                QMessageBox.information(self, "Import", "Tidak ada entri material valid ditemukan di file.")
+                QMessageBox.information(self, "Import", "Tidak ada entri material valid ditemukan di file." + skipped_rows_text(errors))
         except Exception as e:
             QMessageBox.warning(self, "Gagal Import", f"Gagal mengimpor CSV:\n{e}")
 
@@ -874,29 +1589,38 @@ class Resume(QWidget):
             return
         try:
             added = 0
-            with open(filename, newline='', encoding="utf-8") as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    sn = row.get("SN") or row.get("Serial Number") or row.get("sn") or row.get("serial_number") or ""
-                    if not sn:
-                        continue
-                    entry = {
-                        "tanggal": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                        "sn": str(sn).strip(),
-                        "tim": row.get("Tim") or row.get("tim") or LAST_SELECTION.get("tim",""),
-                        "divisi": row.get("Divisi") or row.get("divisi") or LAST_SELECTION.get("divisi","")
-                    }
-                    HISTORI_ONT.append(entry)
-                    added += 1
+            new_entries = []
+            errors = RowErrors()
+            for line, row in read_dicts(filename, errors):
+                sn = (row.get("SN") or row.get("Serial Number") or row.get("sn") or row.get("serial_number") or "").strip()
+                if not sn:
+                    errors.add(line, "SN kosong")
+                    continue
+                entry = {
+                    "tanggal": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    "sn": sn,
+                    "tim": row.get("Tim") or row.get("tim") or LAST_SELECTION.get("tim",""),
+                    "divisi": row.get("Divisi") or row.get("divisi") or LAST_SELECTION.get("divisi","")
+                }
+                new_entries.append(entry)
+                added += 1
             if added > 0:
-                save_json("histori_ont.json", HISTORI_ONT)
-                QMessageBox.information(self, "Import Selesai", f"Berhasil menambahkan {added} SN dari {filename}")
+                self.main.commands.execute("import", f"Import {added} SN ONT", [journal.add("ont", new_entries)])
+                QMessageBox.information(self, "Import Selesai", f"Berhasil menambahkan {added} SN dari {filename}" + skipped_rows_text(errors))
                 self.reload_data()
             else:
-                QMessageBox.information(self, "Import", "Tidak ada SN ditemukan di file.")
+                QMessageBox.information(self, "Import", "Tidak ada SN ditemukan di file." + skipped_rows_text(errors))
         except Exception as e:
             QMessageBox.warning(self, "Gagal Import", f"Gagal mengimpor CSV:\n{e}")
 
+    def rebuild_stores(self):
+        # hanya jika histori atau daftar master diubah di luar command log (arsip, pengaturan);
+        # selain itu store diperbarui per entri lewat observer
+        self.kabel_store.rebuild()
+        self.ont_store.rebuild()
+        self.taken_raw.clear()
+        self.count_taken("mat", HISTORI_MAT)
+
     def reload_data(self):
         # refresh semua tampilan tabel
         self.show_stock()
@@ -904,6 +1628,8 @@ class Resume(QWidget):
         self.show_ont(self.search_ont.text())
 
 class MaterialTracker(QMainWindow):
+    sync_finished = Signal(object)
+
     def __init__(self):
         super().__init__()
 
@@ -925,7 +1651,13 @@ class MaterialTracker(QMainWindow):
             TelegramReportTab('asianet'),
             TelegramReportTab('oxygen')
         ]
+        self.load_all_reports()
 
+        self.commands = open_command_log(on_change=lambda: self.update_undo_actions())
+        self.archive_history(RETENTION.get("bulan", 0))
+        self.forecaster = None
+        self.rebuild_forecaster()
+        self.init_completion()
         self.form_pengambilan = FormPengambilan(self)
         self.resume = Resume(self, self.laporan_tabs)
         self.laporan_tab_wrapper = LaporanTab(self.laporan_tabs)
@@ -935,6 +1667,7 @@ class MaterialTracker(QMainWindow):
         self.tabs.addTab(self.laporan_tab_wrapper, "Laporan")
 
         self.init_menu()
+        self.init_sync()
 
     def init_menu(self):
         menubar = self.menuBar()
@@ -951,40 +1684,248 @@ class MaterialTracker(QMainWindow):
         self.action_settings.triggered.connect(self.show_settings)
         pref_menu.addSeparator()
         pref_menu.addAction(self.action_settings)
+        self.action_archive = QAction("Arsipkan Histori Lama...", self)
+        self.action_archive.triggered.connect(self.show_archive_settings)
+        pref_menu.addAction(self.action_archive)
+        self.action_sync = QAction("Sinkronisasi Sekarang", self)
+        self.action_sync.triggered.connect(self.start_sync)
+        pref_menu.addAction(self.action_sync)
         menubar.addMenu(pref_menu)
 
+        edit_menu = QMenu("&Edit", self)
+        self.action_undo = QAction("Undo", self)
+        self.action_undo.setShortcut(QKeySequence.Undo)
+        self.action_undo.triggered.connect(self.undo)
+        self.action_redo = QAction("Redo", self)
+        self.action_redo.setShortcut(QKeySequence.Redo)
+        self.action_redo.triggered.connect(self.redo)
+        edit_menu.addAction(self.action_undo)
+        edit_menu.addAction(self.action_redo)
+        menubar.addMenu(edit_menu)
+        self.update_undo_actions()
+
         help_menu = QMenu("&Help", self)
         about_action = QAction("Tentang", self)
         about_action.triggered.connect(self.about)
         help_action = QAction("Bantuan Online", self)
         help_action.triggered.connect(lambda: QDesktopServices.openUrl(QUrl("https://github.com/endans/material-tracker")))
+        metrics_action = QAction("Diagnostik Performa...", self)
+        metrics_action.triggered.connect(self.show_metrics)
         help_menu.addAction(about_action)
         help_menu.addAction(help_action)
+        help_menu.addSeparator()
+        help_menu.addAction(metrics_action)
         menubar.addMenu(help_menu)
 
+    def update_undo_actions(self):
+        self.action_undo.setEnabled(self.commands.can_undo())
+        self.action_undo.setText(f"Undo {self.commands.undo_label()}".strip())
+        self.action_redo.setEnabled(self.commands.can_redo())
+        self.action_redo.setText(f"Redo {self.commands.redo_label()}".strip())
+
+    def undo(self):
+        if self.commands.undo():
+            self.reload_all()
+
+    def redo(self):
+        if self.commands.redo():
+            self.reload_all()
+
+    def archive_history(self, months):
+        # histori lebih lama dari `months` bulan dipindah ke segmen arsip terkompresi
+        if months <= 0:
+            return {}
+        cutoff = retention_cutoff(months)
+        try:
+            with METRICS.timer("archive"):
+                moved = ARCHIVE.archive({coll: data for coll, (_, data) in HISTORY_FILES.items()}, cutoff)
+        except (OSError, ValueError, EOFError) as e:
+            # segmen arsip lama rusak/tidak bisa ditulis: entri tetap di histori aktif
+            QMessageBox.warning(self, "Arsip", f"Gagal mengarsipkan histori, data tetap di histori aktif:\n{e}")
+            return {}
+        if moved:
+            # checkpoint juga menulis snapshot semua koleksi
+            self.commands.checkpoint(f"arsip sebelum {cutoff}")
+        return moved
+
+    def show_archive_settings(self):
+        months, ok = QInputDialog.getInt(
+            self, "Arsipkan Histori Lama",
+            "Arsipkan histori yang lebih lama dari (bulan), 0 = nonaktif.\n"
+            "Pengaturan ini juga dijalankan otomatis setiap aplikasi dibuka.\n"
+            "Riwayat Undo/Redo dikosongkan jika ada data yang diarsipkan.",
+            RETENTION.get("bulan") or 12, 0, 240)
+        if not ok:
+            return
+        RETENTION["bulan"] = months
+        save_json("retensi.json", RETENTION)
+        moved = self.archive_history(months)
+        self.update_undo_actions()
+        if moved:
+            self.resume.rebuild_stores()
+            self.rebuild_sn_index()
+            self.reload_all()
+            QMessageBox.information(self, "Arsip", f"{sum(moved.values())} entri histori dipindahkan ke arsip.")
+        else:
+            QMessageBox.information(self, "Arsip", "Tidak ada histori yang perlu diarsipkan.")
+
+    def init_sync(self):
+        self.sync_client = None
+        self.sync_running = False
+        self.sync_finished.connect(self.on_sync_finished)
+        server = SYNC_CONFIG.get("server", "").strip()
+        self.action_sync.setEnabled(bool(server))
+        if not server:
+            return
+        self.sync_client = SyncClient(server, self.commands.path, data_path("sync_state.json"))
+        self.sync_timer = QTimer(self)
+        self.sync_timer.timeout.connect(self.start_sync)
+        self.sync_timer.start(max(int(SYNC_CONFIG.get("interval", 60)), 5) * 1000)
+        QTimer.singleShot(0, self.start_sync)
+
+    def start_sync(self):
+        # HTTP dijalankan di thread terpisah supaya UI tidak tertahan saat server lambat
+        if self.sync_client is None or self.sync_running:
+            return
+        if self.sync_client.needs_bootstrap:
+            # sekali per PC: histori yang sudah ada dikirim sebagai data awal
+            self.sync_client.prepare_bootstrap(self.commands.collections)
+        self.sync_running = True
+        threading.Thread(target=self.sync_worker, daemon=True).start()
+
+    def sync_worker(self):
+        try:
+            with METRICS.timer("sync"):
+                result = self.sync_client.run()
+        except Exception as e:
+            # apa pun penyebabnya (respons HTTP terpotong, JSON tak terduga) hasil harus tetap
+            # dikirim, kalau tidak sync_running tidak pernah direset dan sync berhenti
+            result = e
+        self.sync_finished.emit(result)
+
+    def on_sync_finished(self, result):
+        # dipanggil di thread utama: operasi dari PC lain diterapkan ke data di sini
+        self.sync_running = False
+        if isinstance(result, Exception):
+            self.statusBar().showMessage(f"Sinkronisasi gagal: {result}", 10000)
+            return
+        pushed, ops, server_seq = result
+        applied = self.commands.apply_remote(ops)
+        self.sync_client.mark_pulled(server_seq)
+        METRICS.incr("sync_ops_pushed", pushed)
+        METRICS.incr("sync_ops_pulled", len(ops))
+        # bagian journal yang sudah ter-snapshot dan sudah terkirim boleh dibuang
+        cut = self.commands.compactable(self.sync_client.state["offset"])
+        if cut:
+            self.sync_client.shift_offset(cut)
+            self.commands.compact(cut)
+        if applied:
+            self.reload_all()
+        self.statusBar().showMessage(
+            f"Sinkronisasi selesai: {pushed} dikirim, {len(ops)} diterima", 5000)
+
     def set_theme(self, dark):
         self.action_dark.setChecked(dark)
         self.action_light.setChecked(not dark)
         apply_theme(QApplication.instance(), dark=dark)
 
+    def closeEvent(self, event):
+        # tulisan latar (pengaturan, master, draft) yang gagal dilaporkan sebelum jendela ditutup
+        try:
+            PERSIST.flush()
+        except OSError as e:
+            answer = QMessageBox.question(
+                self, "Gagal Menyimpan",
+                f"{e}\n\nPerubahan pada file tersebut bisa hilang. Tetap tutup aplikasi?",
+                QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+            if answer != QMessageBox.Yes:
+                event.ignore()
+                return
+        super().closeEvent(event)
+
     def about(self):
         QMessageBox.information(
             self, "Tentang",
             f"{APP_NAME} v{VERSION}\n\nAplikasi pelacak material untuk tim CKT Purwokerto.\nDikembangkan - fitur: pencarian cepat, simpan pilihan terakhir, import CSV, dan laporan Oxygen."
         )
 
+    def show_metrics(self):
+        dlg = MetricsDialog(self)
+        dlg.exec()
+
     def show_settings(self):
         dlg = SettingsDialog(self)
         dlg.reload()
         if dlg.exec():
+            # nama tim/divisi bisa diganti (nama lama jadi alias): kunci posting list ikut berubah
+            self.resume.rebuild_stores()
+            self.rebuild_forecaster()
             self.reload_all()
 
+    def rebuild_forecaster(self):
+        # entri dikelompokkan per MASTER.item_key saat datang; setelah nama item diganti
+        # (nama lama jadi alias) kelompoknya harus dihitung ulang
+        if self.forecaster is not None:
+            self.commands.observers.remove(self.forecaster.apply)
+        self.forecaster = build_forecaster()
+        self.commands.observers.append(self.forecaster.apply)
+
+    def init_completion(self):
+        # index completer bersama, frekuensi pemakaian diambil dari histori
+        self.idx_item = CompletionIndex(MASTER.item_names(), Counter(e["deskripsi"] for e in HISTORI_MAT))
+        self.idx_divisi = CompletionIndex(DIVISI, Counter(e.get("divisi", "") for e in HISTORI_MAT + HISTORI_ONT))
+        self.idx_tim = CompletionIndex(TIM, Counter(e.get("tim", "") for e in HISTORI_MAT + HISTORI_ONT))
+        self.idx_sn = CompletionIndex()
+        self.rebuild_sn_index()
+        # SN histori diperbarui per entri lewat observer, bukan scan ulang HISTORI_ONT tiap submit
+        self.commands.observers.append(self.count_sn)
+
+    def rebuild_sn_index(self):
+        # hanya jika histori ONT diubah di luar command log (arsip)
+        self.sn_count = Counter(e["sn"] for e in HISTORI_ONT)
+        self.idx_sn.sync(self.sn_count)
+
+    def count_sn(self, coll, entries, sign=1):
+        # observer command log: SN masuk index saat entri pertamanya ada, keluar saat entri terakhirnya hilang
+        if coll != "ont":
+            return
+        for entry in entries:
+            sn = entry.get("sn", "")
+            self.sn_count[sn] += sign
+            if self.sn_count[sn] <= 0:
+                del self.sn_count[sn]
+                self.idx_sn.remove(sn)
+            elif sign > 0:
+                self.idx_sn.add(sn)
+
+    def sync_completion(self):
+        # master list bisa berubah (pengaturan, import, stock): update index secara bertahap
+        self.idx_item.sync(MASTER.item_names())
+        self.idx_divisi.sync(DIVISI)
+        self.idx_tim.sync(TIM)
+
+    @METRICS.timed("reload_all")
     def reload_all(self):
         # reload opsi form pengambilan & resume data
+        self.sync_completion()
         self.form_pengambilan.reload_options()
+        self.load_all_reports()
         self.resume.reload_data()
-        for tab in self.laporan_tabs:
-            tab.load_reports()
+
+    def refresh_history(self):
+        # setelah submit: laporan tidak berubah, cukup index completer dan tampilan histori
+        self.sync_completion()
+        self.resume.reload_data()
+
+    @METRICS.timed("load_reports")
+    def load_all_reports(self):
+        # parse semua file laporan sekaligus di worker pool, lalu bagikan ke tiap tab
+        jobs_per_tab = [tab.report_jobs() for tab in self.laporan_tabs]
+        results = load_report_files([job for jobs in jobs_per_tab for job in jobs], REPORT_INDEX_DIR)
+        pos = 0
+        for tab, jobs in zip(self.laporan_tabs, jobs_per_tab):
+            tab.apply_reports(results[pos:pos + len(jobs)])
+            pos += len(jobs)
 
 class LaporanTab(QWidget):
     def __init__(self, laporan_tabs):
@@ -996,10 +1937,34 @@ class LaporanTab(QWidget):
         layout = QVBoxLayout(self)
         layout.addWidget(self.tabs)
 
+def print_forecast(show_all, warn_days):
+    # replay journal supaya perubahan sesudah snapshot terakhir ikut dihitung, tanpa menulis file
+    # apa pun (aplikasi bisa saja sedang terbuka dan memakai journal yang sama)
+    open_command_log(read_only=True)
+    rows = build_forecaster().forecast(warn_days=warn_days)
+    if not show_all:
+        rows = [r for r in rows if r["status"] != "Aman"]
+    if not rows:
+        print("Semua stock aman." if not show_all else "Belum ada data stock.")
+        return
+    print(format_report(rows))
+
 def main():
-    app = QApplication(sys.argv)
+    parser = argparse.ArgumentParser(description=APP_NAME)
+    parser.add_argument("--forecast", action="store_true", help="cetak peringatan stock menipis lalu keluar")
+    parser.add_argument("--semua", action="store_true", help="dengan --forecast: tampilkan semua item")
+    parser.add_argument("--hari", type=float, default=WARN_DAYS, help="batas hari untuk status menipis")
+    args, qt_args = parser.parse_known_args()
+    init_data()
+    if args.forecast:
+        print_forecast(args.semua, args.hari)
+        return
+    METRICS.enable_log(data_path("metrics.log"))
+    app = QApplication(sys.argv[:1] + qt_args)
     apply_theme(app, dark=False)
+    app.aboutToQuit.connect(PERSIST.close)
     mw = MaterialTracker()
+    app.aboutToQuit.connect(mw.commands.close)
     mw.show()
     sys.exit(app.exec())
 
@@ -0,0 +1,171 @@
+# masterdata.py - daftar master (divisi, tim, material, aksesori) dengan kunci ternormalisasi
+MASTER_FILES = {
+    "divisi": "divisi.json",
+    "tim": "tim.json",
+    "material": "material.json",
+    "aksesori": "aksesori.json",
+}
+ALIAS_FILE = "aliases.json"
+
+
+def clean(name):
+    """Rapikan spasi: ' Kabel  DC 1C ' -> 'Kabel DC 1C'."""
+    return " ".join(str(name or "").split())
+
+
+def normalize(name):
+    """Kunci pembanding: spasi dirapikan dan huruf diseragamkan ("Kabel DC 1C" == "kabel dc 1c")."""
+    return clean(name).casefold()
+
+
+class MasterList:
+    """Daftar nama terurut (urutan tampil dipertahankan) dengan index kunci ternormalisasi.
+
+    Cek keanggotaan, tambah dan resolve alias semuanya O(1). Ejaan yang hanya beda
+    huruf besar/kecil atau spasi dianggap nama yang sama; ejaan pertama yang dipakai.
+    """
+    def __init__(self, items=(), aliases=None):
+        self.items = []
+        self.keys = {}
+        self.aliases = {normalize(k): clean(v) for k, v in (aliases or {}).items()}
+        self.dirty = False
+        self.aliases_dirty = False
+        items = list(items)
+        self.set_items(items)
+        # duplikat/spasi berlebih digabung saat load: file perlu ditulis ulang
+        self.dirty = self.items != items
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __getitem__(self, i):
+        return self.items[i]
+
+    def __contains__(self, name):
+        return self.canonical(name) is not None
+
+    def canonical(self, name):
+        """Ejaan resmi untuk `name` (termasuk lewat alias), atau None jika tidak dikenal."""
+        key = normalize(name)
+        found = self.keys.get(key)
+        if found is None:
+            target = self.aliases.get(key)
+            found = self.keys.get(normalize(target)) if target else None
+        return found
+
+    def resolve(self, name):
+        """Ejaan resmi jika sudah terdaftar, selain itu nama yang sudah dirapikan."""
+        found = self.canonical(name)
+        return found if found is not None else clean(name)
+
+    def key(self, name):
+        """Kunci pembanding setelah alias di-resolve (nama lama dan baru -> kunci sama)."""
+        return normalize(self.resolve(name))
+
+    def set_items(self, items):
+        self.items, self.keys = [], {}
+        for name in items:
+            self.add(name)
+        self.dirty = True
+
+    def add(self, name):
+        """Tambahkan nama jika belum ada; kembalikan ejaan resmi ('' untuk nama kosong)."""
+        name = clean(name)
+        if not name:
+            return ""
+        existing = self.canonical(name)
+        if existing is not None:
+            return existing
+        self.items.append(name)
+        self.keys[normalize(name)] = name
+        self.dirty = True
+        return name
+
+    def remove_at(self, i):
+        name = self.items.pop(i)
+        del self.keys[normalize(name)]
+        dropped = [k for k, v in self.aliases.items() if normalize(v) == normalize(name)]
+        for key in dropped:
+            del self.aliases[key]
+        self.dirty = True
+        self.aliases_dirty = self.aliases_dirty or bool(dropped)
+        return name
+
+    def rename(self, i, new):
+        """Ganti nama item ke-i; nama lama dijadikan alias. False jika bentrok dengan item lain."""
+        new = clean(new)
+        old = self.items[i]
+        key, old_key = normalize(new), normalize(old)
+        if not new or (key in self.keys and key != old_key):
+            return False
+        del self.keys[old_key]
+        self.items[i] = new
+        self.keys[key] = new
+        for alias, target in self.aliases.items():
+            if normalize(target) == old_key:
+                self.aliases[alias] = new
+        if key != old_key:
+            # histori lama yang masih memakai nama lama tetap dikenali
+            self.aliases[old_key] = new
+        self.aliases.pop(key, None)
+        self.dirty = True
+        self.aliases_dirty = True
+        return True
+
+    def add_alias(self, alias, target):
+        target = self.canonical(target)
+        key = normalize(alias)
+        if target is None or not key or key in self.keys:
+            return False
+        self.aliases[key] = target
+        self.aliases_dirty = True
+        return True
+
+
+class MasterRegistry:
+    """Semua daftar master + alias; perubahan dikumpulkan dan disimpan sekaligus lewat save()."""
+    def __init__(self, load, save):
+        self._save = save
+        aliases = load(ALIAS_FILE, {})
+        self.lists = {name: MasterList(load(filename, []), aliases.get(name))
+                      for name, filename in MASTER_FILES.items()}
+        self.divisi = self.lists["divisi"]
+        self.tim = self.lists["tim"]
+        self.material = self.lists["material"]
+        self.aksesori = self.lists["aksesori"]
+
+    def item_names(self):
+        return self.material.items + self.aksesori.items
+
+    def resolve_item(self, name):
+        """Ejaan resmi material/aksesori, atau nama yang sudah dirapikan jika belum terdaftar."""
+        found = self.material.canonical(name)
+        if found is None:
+            found = self.aksesori.canonical(name)
+        return found if found is not None else clean(name)
+
+    def item_key(self, name):
+        # kunci pengelompokan stock: ejaan berbeda untuk item yang sama jatuh ke kunci yang sama
+        return normalize(self.resolve_item(name))
+
+    def add_item(self, name):
+        """Daftarkan item baru ke MATERIAL jika belum ada di material maupun aksesori."""
+        found = self.material.canonical(name)
+        if found is None:
+            found = self.aksesori.canonical(name)
+        return found if found is not None else self.material.add(name)
+
+    def save(self, force=False):
+        """Tulis hanya daftar yang berubah (force: tulis semua)."""
+        for name, filename in MASTER_FILES.items():
+            master = self.lists[name]
+            if force or master.dirty:
+                self._save(filename, master.items)
+                master.dirty = False
+        if force or any(m.aliases_dirty for m in self.lists.values()):
+            self._save(ALIAS_FILE, {name: m.aliases for name, m in self.lists.items() if m.aliases})
+            for master in self.lists.values():
+                master.aliases_dirty = False
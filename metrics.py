@@ -0,0 +1,126 @@
+# metrics.py - timer, counter dan profiling ringan untuk diagnosa performa
+import cProfile
+import functools
+import inspect
+import io
+import json
+import logging
+import pstats
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+
+WINDOW = 500  # jumlah sampel terakhir per timer
+
+
+class Metrics:
+    """Kumpulan timer (sampel durasi terakhir) dan counter; opsional ditulis ke log berputar."""
+    def __init__(self, window=WINDOW):
+        self.samples = defaultdict(lambda: deque(maxlen=window))
+        self.calls = Counter()
+        self.counters = Counter()
+        self.logger = None
+        self.profiler = None
+
+    def enable_log(self, path, max_bytes=1024 * 1024, backups=3):
+        logger = logging.getLogger("material_tracker.metrics")
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        if not logger.handlers:
+            handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            logger.addHandler(handler)
+        self.logger = logger
+
+    def record(self, name, seconds):
+        self.samples[name].append(seconds)
+        self.calls[name] += 1
+        if self.logger is not None:
+            self.logger.info(json.dumps({"timer": name, "ms": round(seconds * 1000, 3)}))
+
+    def incr(self, name, n=1):
+        self.counters[name] += n
+
+    @contextmanager
+    def timer(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - t0)
+
+    def timed(self, name):
+        """Decorator: catat durasi setiap pemanggilan fungsi ke timer `name`."""
+        def decorator(fn):
+            # signal Qt (textChanged, dateChanged, clicked) mengirim argumen ke slot; wrapper
+            # *args tidak punya signature, jadi argumen yang tidak diterima fn dibuang di sini
+            params = inspect.signature(fn).parameters.values()
+            if any(p.kind == p.VAR_POSITIONAL for p in params):
+                max_args = None
+            else:
+                max_args = sum(1 for p in params if p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD))
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                t0 = time.perf_counter()
+                try:
+                    return fn(*args[:max_args], **kwargs)
+                finally:
+                    self.record(name, time.perf_counter() - t0)
+            return wrapper
+        return decorator
+
+    def summary(self, name):
+        """Statistik sampel terakhir (dalam ms): count, last, p50, p90, p99, max."""
+        data = self.samples.get(name)
+        if not data:
+            return None
+        ordered = sorted(data)
+
+        def pct(p):
+            return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] * 1000
+
+        return {
+            "count": self.calls[name],
+            "last": data[-1] * 1000,
+            "p50": pct(50),
+            "p90": pct(90),
+            "p99": pct(99),
+            "max": ordered[-1] * 1000,
+        }
+
+    def snapshot(self):
+        return {
+            "timers": {name: self.summary(name) for name in sorted(self.samples)},
+            "counters": dict(self.counters),
+        }
+
+    def reset(self):
+        self.samples.clear()
+        self.calls.clear()
+        self.counters.clear()
+
+    @property
+    def profiling(self):
+        return self.profiler is not None
+
+    def start_profile(self):
+        if self.profiler is None:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    def stop_profile(self, path=None, top=30):
+        """Hentikan cProfile; simpan ke `path` (format .prof) dan kembalikan ringkasan teks."""
+        if self.profiler is None:
+            return ""
+        self.profiler.disable()
+        profiler, self.profiler = self.profiler, None
+        if path:
+            profiler.dump_stats(path)
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(top)
+        return out.getvalue()
+
+
+METRICS = Metrics()
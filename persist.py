@@ -0,0 +1,126 @@
+# persist.py - penulisan file JSON kecil (pengaturan, draft) di thread latar dengan debounce
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+
+DELAY = 0.5      # jeda sejak tulisan terakhir sebelum file ditulis
+MAX_DELAY = 3.0  # batas tunda walaupun tulisan terus berdatangan
+
+log = logging.getLogger("material_tracker.persist")
+
+
+class Persister:
+    """Antrian tulis file JSON yang ditangani satu thread latar.
+
+    write() hanya menyimpan snapshot terbaru per file lalu kembali; beberapa tulisan ke file
+    yang sama dalam jeda debounce digabung menjadi satu. flush() menulis semua yang tertunda
+    secara sinkron. Tulisan yang gagal dicatat ke log lalu dicoba lagi (kecuali sudah ada snapshot
+    yang lebih baru); selama belum berhasil, flush() melaporkannya sebagai OSError. close()
+    (dipanggil otomatis saat proses keluar) hanya mencatat yang masih gagal ke log.
+    """
+    def __init__(self, directory, delay=DELAY, max_delay=MAX_DELAY):
+        self.directory = directory
+        self.delay = delay
+        self.max_delay = max_delay
+        self.pending = {}
+        self.first = None
+        self.last = None
+        self.cond = threading.Condition()
+        self.write_lock = threading.Lock()  # urutan tulis ke disk selalu sesuai urutan snapshot
+        self.closed = False
+        self.errors = {}  # filename -> OSError terakhir, sampai file itu berhasil ditulis
+        self.thread = threading.Thread(target=self._run, name="persist", daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def write(self, filename, data):
+        # serialisasi di thread pemanggil supaya snapshot konsisten walau data diubah sesudahnya
+        payload = json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+        self._schedule(filename, payload)
+
+    def remove(self, filename):
+        self._schedule(filename, None)
+
+    def _schedule(self, filename, payload):
+        with self.cond:
+            now = time.monotonic()
+            self.pending[filename] = payload
+            self.first = self.first or now
+            self.last = now
+            self.cond.notify()
+
+    def _take(self):
+        batch, self.pending = self.pending, {}
+        self.first = self.last = None
+        return batch
+
+    def _write(self, batch):
+        for filename, payload in batch.items():
+            path = os.path.join(self.directory, filename)
+            try:
+                if payload is None:
+                    if os.path.exists(path):
+                        os.remove(path)
+                    continue
+                tmp = path + ".tmp"
+                with open(tmp, "wb") as f:
+                    f.write(payload)
+                os.replace(tmp, path)
+            except OSError as e:
+                if filename not in self.errors:
+                    log.error("gagal menulis %s: %s", path, e)
+                self.errors[filename] = e
+                self._retry(filename, payload)
+            else:
+                if self.errors.pop(filename, None) is not None:
+                    log.info("%s berhasil ditulis ulang", path)
+
+    def _retry(self, filename, payload):
+        # snapshot yang gagal dikembalikan ke antrian, kecuali sudah digantikan yang lebih baru
+        with self.cond:
+            if filename not in self.pending:
+                self._schedule(filename, payload)
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while not self.pending and not self.closed:
+                    self.cond.wait()
+                if self.closed:
+                    return
+                due = min(self.last + self.delay, self.first + self.max_delay)
+                wait = due - time.monotonic()
+                if wait > 0:
+                    self.cond.wait(wait)
+                    continue
+            # kegagalan di thread latar disimpan di self.errors dan dicoba lagi sesudah jeda
+            self._flush()
+
+    def _flush(self):
+        with self.write_lock:
+            with self.cond:
+                batch = self._take()
+            self._write(batch)
+
+    def _report(self):
+        with self.write_lock:
+            errors = dict(self.errors)
+        if errors:
+            detail = "; ".join(f"{name}: {e.strerror or e}" for name, e in errors.items())
+            raise OSError(f"Gagal menyimpan {len(errors)} file: {detail}")
+
+    def flush(self):
+        self._flush()
+        self._report()
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify()
+        try:
+            self.flush()
+        except OSError as e:
+            log.error("%s", e)
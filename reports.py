@@ -0,0 +1,378 @@
+# reports.py - parsing dan index file laporan CSV (MyRepublic, Asianet, Oxygen)
+# Modul ini sengaja tidak mengimpor Qt supaya bisa dijalankan di worker process.
+import csv
+import glob
+import hashlib
+import io
+import json
+import mmap
+import os
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from csvio import RowErrors, check_row, clean_header, sniff
+
+REPORT_COLUMNS = ("Timestamp", "Subscription ID", "Customer", "SN", "Team")
+
+INDEX_VERSION = 2
+# urutan array di file index (setelah baris header JSON)
+INDEX_ARRAYS = (
+    ("offsets", "q"),       # offset byte awal tiap baris, + 1 offset akhir file
+    ("dates", "i"),         # tanggal yyyymmdd per baris, 0 jika tidak bisa diparse
+    ("sn_hashes", "I"),     # crc32 SN per baris, 0 jika SN kosong
+    ("date_order", "i"),    # nomor baris terurut menurut tanggal
+    ("sorted_dates", "i"),
+    ("sn_order", "i"),      # nomor baris terurut menurut hash SN
+    ("sorted_hashes", "I"),
+)
+
+_EXECUTOR = None
+# ambang pemakaian worker pool: di bawah ini index dibangun berurutan di proses utama
+PARALLEL_MIN_JOBS = 3
+PARALLEL_MIN_BYTES = 8 * 1024 * 1024
+
+
+def map_report_row(report_type, row):
+    """Petakan satu baris CSV mentah ke tuple sesuai REPORT_COLUMNS."""
+    if report_type == 'asianet':
+        return (
+            row.get("Timestamp", "") or row.get("Tanggal", ""),
+            row.get("ID Pelanggan", ""),
+            row.get("Nama Pelanggan", ""),
+            row.get("SN", ""),
+            row.get("Nama Teknisi", ""),
+        )
+    return (
+        row.get("Timestamp", "") or row.get("tanggal", ""),
+        row.get("Subscription ID", "") or row.get("ID Pelanggan", ""),
+        row.get("Customer", "") or row.get("Nama Pelanggan", ""),
+        row.get("SN", "") or row.get("Serial Number", ""),
+        row.get("Team", "") or row.get("Nama Teknisi", ""),
+    )
+
+
+def parse_report_date(timestamp):
+    """Tanggal laporan (yyyy-mm-dd / dd-mm-yyyy, '/' juga boleh) -> int yyyymmdd, 0 jika gagal."""
+    parts = (timestamp or "")[:10].replace('/', '-').split('-')
+    if len(parts) != 3:
+        return 0
+    try:
+        if len(parts[0]) == 4:
+            y, m, d = int(parts[0]), int(parts[1]), int(parts[2])
+        elif len(parts[2]) == 4:
+            d, m, y = int(parts[0]), int(parts[1]), int(parts[2])
+        else:
+            return 0
+    except ValueError:
+        return 0
+    if not (1 <= m <= 12 and 1 <= d <= 31):
+        return 0
+    return y * 10000 + m * 100 + d
+
+
+def sn_hash(sn):
+    sn = (sn or "").strip()
+    if not sn:
+        return 0
+    return zlib.crc32(sn.encode("utf-8")) or 1
+
+
+def _iter_records(mm, start):
+    """Yield (offset_awal, offset_akhir) tiap record CSV; record boleh berisi newline dalam tanda kutip."""
+    mm.seek(start)
+    begin = start
+    quotes = 0
+    while True:
+        line = mm.readline()
+        if not line:
+            break
+        quotes += line.count(b'"')
+        if quotes % 2 == 0:
+            end = mm.tell()
+            if line.strip():
+                yield begin, end
+            begin = end
+            quotes = 0
+    if begin < mm.tell():
+        yield begin, mm.tell()
+
+
+def _decode_record(data, encoding="utf-8", delimiter=","):
+    # hanya record pertama: setelah baris rusak yang dilewati, data bisa memuat baris itu juga
+    return next(csv.reader(io.StringIO(data.decode(encoding, errors="replace")), delimiter=delimiter), [])
+
+
+def index_path_for(csv_file, index_dir):
+    key = hashlib.sha1(os.path.abspath(csv_file).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(index_dir, f"{os.path.basename(csv_file)}.{key}.idx")
+
+
+def _file_signature(path):
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+
+def read_index(index_path, csv_file=None, report_type=None):
+    """Baca index dari disk; kembalikan None jika tidak ada atau sudah basi (size/mtime berubah)."""
+    try:
+        with open(index_path, "rb") as f:
+            header = json.loads(f.readline().decode("utf-8"))
+            if header.get("version") != INDEX_VERSION:
+                return None
+            if report_type is not None and header.get("report_type") != report_type:
+                return None
+            if csv_file is not None:
+                size, mtime_ns = _file_signature(csv_file)
+                if header.get("size") != size or header.get("mtime_ns") != mtime_ns:
+                    return None
+            arrays = {}
+            for name, typecode in INDEX_ARRAYS:
+                arr = array(typecode)
+                count = header["rows"] + 1 if name == "offsets" else header["rows"]
+                arr.fromfile(f, count)
+                arrays[name] = arr
+        return header, arrays
+    except (OSError, ValueError, KeyError, EOFError):
+        return None
+
+
+def build_index(csv_file, report_type, index_path):
+    """Scan file laporan sekali lewat mmap dan simpan index offset baris, tanggal dan hash SN.
+
+    Encoding/BOM/delimiter dideteksi dulu (csvio.sniff) dan disimpan di header index.
+    Baris yang jumlah kolomnya tidak sesuai tidak masuk index, hanya dicatat sebagai error.
+    """
+    size, mtime_ns = _file_signature(csv_file)
+    fmt = sniff(csv_file)
+    if fmt.encoding == "utf-16":
+        raise ValueError("File laporan UTF-16 belum didukung, simpan ulang sebagai CSV UTF-8")
+    encoding, delimiter = fmt.encoding, fmt.delimiter
+    offsets = array("q")
+    last_end = 0
+    dates = array("i")
+    hashes = array("I")
+    fieldnames = []
+    errors = RowErrors()
+    if size:
+        with open(csv_file, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            records = _iter_records(mm, fmt.bom)
+            first = next(records, None)
+            if first is not None:
+                fieldnames = clean_header(_decode_record(mm[first[0]:first[1]], encoding, delimiter))
+                width = len(fieldnames)
+                # nomor baris fisik hanya dihitung saat ada error (jarang), lanjut dari posisi terakhir
+                counted = [0, 1]
+
+                def line_at(offset):
+                    counted[1] += mm[counted[0]:offset].count(b"\n")
+                    counted[0] = offset
+                    return counted[1]
+
+                for begin, end in records:
+                    data = mm[begin:end]
+                    try:
+                        text = data.decode(encoding)
+                    except UnicodeDecodeError:
+                        errors.add(line_at(begin), f"karakter tidak valid untuk encoding {encoding}")
+                        text = data.decode(encoding, errors="replace")
+                    values = next(csv.reader(io.StringIO(text), delimiter=delimiter), [])
+                    problem = check_row(values, width)
+                    if problem:
+                        errors.add(line_at(begin), problem)
+                        continue
+                    mapped = map_report_row(report_type, dict(zip(fieldnames, values)))
+                    offsets.append(begin)
+                    last_end = end
+                    dates.append(parse_report_date(mapped[0]))
+                    hashes.append(sn_hash(mapped[3]))
+    offsets.append(last_end)
+    n = len(dates)
+    date_order = array("i", sorted(range(n), key=dates.__getitem__))
+    sn_order = array("i", sorted(range(n), key=hashes.__getitem__))
+    arrays = {
+        "offsets": offsets,
+        "dates": dates,
+        "sn_hashes": hashes,
+        "date_order": date_order,
+        "sorted_dates": array("i", (dates[i] for i in date_order)),
+        "sn_order": sn_order,
+        "sorted_hashes": array("I", (hashes[i] for i in sn_order)),
+    }
+    header = {
+        "version": INDEX_VERSION,
+        "csv_file": os.path.abspath(csv_file),
+        "report_type": report_type,
+        "size": size,
+        "mtime_ns": mtime_ns,
+        "rows": n,
+        "fieldnames": fieldnames,
+        "encoding": encoding,
+        "delimiter": delimiter,
+        "errors": errors.count,
+        "error_samples": errors.samples,
+    }
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(json.dumps(header, ensure_ascii=False).encode("utf-8") + b"\n")
+        for name, _ in INDEX_ARRAYS:
+            arrays[name].tofile(f)
+    os.replace(tmp_path, index_path)
+    return header, arrays
+
+
+def index_report_file(path, report_type, index_dir):
+    """Worker: pastikan index file laporan valid (bangun ulang jika basi), kembalikan (path, index_path, error)."""
+    try:
+        os.makedirs(index_dir, exist_ok=True)
+        index_path = index_path_for(path, index_dir)
+        if read_index(index_path, path, report_type) is None:
+            build_index(path, report_type, index_path)
+        return path, index_path, None
+    except Exception as e:
+        return path, None, str(e)
+
+
+class ReportFile:
+    """File laporan yang di-mmap; baris dibaca lazy lewat index offset."""
+
+    CACHE_SIZE = 512
+
+    def __init__(self, csv_file, report_type, index_path):
+        self.csv_file = csv_file
+        self.report_type = report_type
+        loaded = read_index(index_path, csv_file, report_type)
+        if loaded is None:
+            # file berubah sejak worker selesai: bangun ulang di sini
+            loaded = build_index(csv_file, report_type, index_path)
+        header, arrays = loaded
+        self.fieldnames = header["fieldnames"]
+        self.rows = header["rows"]
+        self.encoding = header["encoding"]
+        self.delimiter = header["delimiter"]
+        self.errors = RowErrors(header["error_samples"], header["errors"])
+        for name, _ in INDEX_ARRAYS:
+            setattr(self, name, arrays[name])
+        self._file = None
+        self._mm = None
+        if self.rows:
+            self._file = open(csv_file, "rb")
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._cache = {}
+
+    def __len__(self):
+        return self.rows
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._file.close()
+            self._mm = None
+            self._file = None
+        self._cache.clear()
+
+    def row(self, i):
+        """Tuple REPORT_COLUMNS untuk baris ke-i (di-cache sebagian)."""
+        cached = self._cache.get(i)
+        if cached is not None:
+            return cached
+        data = self._mm[self.offsets[i]:self.offsets[i + 1]]
+        values = _decode_record(data, self.encoding, self.delimiter)
+        mapped = map_report_row(self.report_type, dict(zip(self.fieldnames, values)))
+        if len(self._cache) >= self.CACHE_SIZE:
+            self._cache.clear()
+        self._cache[i] = mapped
+        return mapped
+
+    def rows_in_date_range(self, date_from, date_to):
+        """Nomor baris dengan tanggal date_from..date_to (int yyyymmdd), terurut menurut tanggal.
+
+        Baris yang tanggalnya tidak bisa diparse selalu ikut supaya tidak hilang.
+        """
+        undated = bisect_right(self.sorted_dates, 0)
+        lo = max(bisect_left(self.sorted_dates, date_from), undated)
+        hi = bisect_right(self.sorted_dates, date_to)
+        return list(self.date_order[:undated]) + list(self.date_order[lo:hi])
+
+    def find_sn(self, sn):
+        """Nomor baris yang SN-nya sama persis dengan sn."""
+        sn = (sn or "").strip()
+        h = sn_hash(sn)
+        if not h:
+            return []
+        lo = bisect_left(self.sorted_hashes, h)
+        hi = bisect_right(self.sorted_hashes, h)
+        return [i for i in self.sn_order[lo:hi] if self.row(i)[3].strip() == sn]
+
+    def has_sn(self, sn):
+        return bool(self.find_sn(sn))
+
+
+def rotated_report_files(csv_file):
+    """File laporan utama beserta file rotasi bulanan (mis. wifi_reports_2024-05.csv).
+
+    File rotasi (lebih lama) diurutkan lebih dulu, file utama paling akhir.
+    """
+    stem, ext = os.path.splitext(csv_file)
+    rotated = set(glob.glob(f"{glob.escape(stem)}_*{ext}"))
+    rotated.update(glob.glob(f"{glob.escape(stem)}-*{ext}"))
+    files = sorted(rotated)
+    if os.path.exists(csv_file):
+        files.append(csv_file)
+    return files
+
+
+def _executor():
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        _EXECUTOR = ProcessPoolExecutor(max_workers=os.cpu_count() or 1)
+    return _EXECUTOR
+
+
+def _index_fresh(csv_file, report_type, index_path):
+    # cukup baca baris header index; array baru dibaca saat ReportFile dibuka
+    try:
+        with open(index_path, "rb") as f:
+            header = json.loads(f.readline().decode("utf-8"))
+        size, mtime_ns = _file_signature(csv_file)
+    except (OSError, ValueError):
+        return False
+    return (header.get("version") == INDEX_VERSION and header.get("report_type") == report_type
+            and header.get("size") == size and header.get("mtime_ns") == mtime_ns)
+
+
+def load_report_files(jobs, index_dir):
+    """Validasi/bangun index banyak file laporan secara paralel.
+
+    jobs: list (path, report_type). Hasil (path, index_path, error) dikembalikan
+    dengan urutan sama seperti jobs; membuka ReportFile dilakukan pemanggil di
+    thread utama.
+    """
+    global _EXECUTOR
+    results = {}
+    stale = []
+    for path, rtype in jobs:
+        index_path = index_path_for(path, index_dir)
+        if _index_fresh(path, rtype, index_path):
+            results[path, rtype] = (path, index_path, None)
+        else:
+            stale.append((path, rtype))
+    # menyalakan worker (spawn di Windows/macOS) mahal; pool hanya dipakai jika banyak
+    # file yang benar-benar perlu di-index ulang dan ukurannya cukup besar
+    parallel = len(stale) >= PARALLEL_MIN_JOBS and sum(
+        os.path.getsize(path) for path, _ in stale if os.path.exists(path)) >= PARALLEL_MIN_BYTES
+    if parallel:
+        try:
+            paths = [path for path, _ in stale]
+            rtypes = [rtype for _, rtype in stale]
+            for job, result in zip(stale, _executor().map(index_report_file, paths, rtypes, [index_dir] * len(stale))):
+                results[job] = result
+            stale = []
+        except (OSError, BrokenProcessPool, NotImplementedError):
+            # mis. lingkungan tanpa dukungan multiprocessing: jatuh ke mode berurutan
+            _EXECUTOR = None
+    for path, rtype in stale:
+        results[path, rtype] = index_report_file(path, rtype, index_dir)
+    return [results[job] for job in jobs]
@@ -0,0 +1,338 @@
+# sync.py - sinkronisasi opsional antar PC gudang: server asyncio kecil + client berbasis journal
+#
+#   python sync.py serve --host 0.0.0.0 --port 8765 --data ~/material_sync
+#   python sync.py selftest    # server + dua client di localhost, cek hasil sinkronisasi
+#
+# Client di aplikasi hanya mengirim delta journal sejak offset terakhir (push) dan mengambil
+# operasi PC lain sejak server_seq terakhir (pull), jadi biaya sync sebanding jumlah perubahan.
+# Saat pertama kali sync, semua entri yang sudah ada dikirim sekali sebagai data awal.
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import urllib.request
+import uuid
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+import journal
+from journal import read_journal
+
+BATCH = 500  # operasi per request push/pull
+BOOTSTRAP_ENTRIES = 500  # entri per operasi data awal
+BOOTSTRAP_BATCH = 20     # operasi data awal per request push
+MAX_BODY = 32 * 1024 * 1024
+DEFAULT_PORT = 8765
+
+
+def encode(payload):
+    return gzip.compress(json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+
+
+def decode(data, encoding=""):
+    if "gzip" in encoding:
+        data = gzip.decompress(data)
+    return json.loads(data.decode("utf-8")) if data else {}
+
+
+class SyncServer:
+    """Log operasi bersama: setiap operasi dapat server_seq berurutan, op_id dipakai untuk idempotensi."""
+    def __init__(self, data_dir):
+        os.makedirs(data_dir, exist_ok=True)
+        self.path = os.path.join(data_dir, "ops.jsonl")
+        self.ops = []
+        self.seen = set()
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        continue
+                    self.ops.append(rec)
+                    self.seen.add(rec["op"]["op_id"])
+        except OSError:
+            pass
+
+    @property
+    def seq(self):
+        return len(self.ops)
+
+    def push(self, client, ops):
+        fresh = []
+        for op in ops:
+            op_id = op.get("op_id")
+            if not op_id or op_id in self.seen:
+                continue
+            self.seen.add(op_id)
+            rec = {"server_seq": self.seq + 1, "client": client, "op": op}
+            self.ops.append(rec)
+            fresh.append(rec)
+        if fresh:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.writelines(json.dumps(rec, ensure_ascii=False) + "\n" for rec in fresh)
+        return {"accepted": len(fresh), "server_seq": self.seq}
+
+    def pull(self, client, since, limit):
+        # server_seq = posisi di list + 1, jadi awal potongan langsung diketahui
+        since = max(0, min(since, self.seq))
+        ops = []
+        pos = since
+        while pos < self.seq and len(ops) < limit:
+            rec = self.ops[pos]
+            pos += 1
+            if rec["client"] != client:
+                ops.append(rec["op"])
+        return {"ops": ops, "next": pos, "server_seq": self.seq, "more": pos < self.seq}
+
+    def route(self, method, target, body):
+        url = urlsplit(target)
+        query = parse_qs(url.query)
+        if method == "POST" and url.path == "/push":
+            return 200, self.push(body.get("client", ""), body.get("ops", []))
+        if method == "GET" and url.path == "/pull":
+            since = int(query.get("since", ["0"])[0])
+            limit = min(int(query.get("limit", [str(BATCH)])[0]), BATCH)
+            return 200, self.pull(query.get("client", [""])[0], since, limit)
+        if method == "GET" and url.path == "/status":
+            return 200, {"server_seq": self.seq}
+        return 404, {"error": "not found"}
+
+    async def handle(self, reader, writer):
+        headers = {}
+        try:
+            method, target, _ = (await reader.readline()).decode("latin-1").split(" ", 2)
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                key, _, value = line.decode("latin-1").partition(":")
+                headers[key.strip().lower()] = value.strip()
+            length = int(headers.get("content-length", 0))
+            if length > MAX_BODY:
+                status, payload = 413, {"error": "payload terlalu besar"}
+            else:
+                body = decode(await reader.readexactly(length), headers.get("content-encoding", "")) if length else {}
+                status, payload = self.route(method, target, body)
+        except (ValueError, KeyError, OSError, asyncio.IncompleteReadError) as e:
+            status, payload = 400, {"error": str(e)}
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        extra = ""
+        if "gzip" in headers.get("accept-encoding", ""):
+            data = gzip.compress(data)
+            extra = "Content-Encoding: gzip\r\n"
+        head = (f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n{extra}Connection: close\r\n\r\n")
+        writer.write(head.encode("latin-1") + data)
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"Sync server di http://{host}:{port} ({self.seq} operasi, data: {self.path})", flush=True)
+        async with server:
+            await server.serve_forever()
+
+
+class SyncClient:
+    """Client sync: push record journal lokal (do/undo/redo) dan pull operasi PC lain.
+
+    Status (client_id, offset journal, server_seq terakhir, data awal sudah dikirim)
+    disimpan di state_path.
+    """
+    def __init__(self, server, journal_path, state_path, timeout=15):
+        self.server = server.rstrip("/")
+        self.journal_path = journal_path
+        self.state_path = state_path
+        self.timeout = timeout
+        self.state = {"client_id": uuid.uuid4().hex, "offset": 0, "pulled": 0, "bootstrapped": False}
+        self.bootstrap = None
+        try:
+            with open(state_path, encoding="utf-8") as f:
+                self.state.update(json.load(f))
+        except (OSError, ValueError):
+            pass
+        self.save_state()
+
+    def save_state(self):
+        tmp = self.state_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.state, f)
+        os.replace(tmp, self.state_path)
+
+    def request(self, method, path, payload=None):
+        headers = {"Accept-Encoding": "gzip"}
+        data = None
+        if payload is not None:
+            data = encode(payload)
+            headers.update({"Content-Type": "application/json", "Content-Encoding": "gzip"})
+        req = urllib.request.Request(self.server + path, data=data, headers=headers, method=method)
+        with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+            return decode(resp.read(), resp.headers.get("Content-Encoding", ""))
+
+    @property
+    def needs_bootstrap(self):
+        return not self.state["bootstrapped"] and self.bootstrap is None
+
+    def prepare_bootstrap(self, collections):
+        """Siapkan data awal: semua entri yang ada sekarang, termasuk yang dibuat sebelum journal
+        atau sebelum PC ini ikut sync. Dipanggil di thread yang mengubah koleksi (thread utama)
+        supaya salinan dan ukuran journal konsisten; dikirim pada push berikutnya.
+
+        op_id diturunkan dari id entri, jadi pengiriman ulang setelah gagal tetap idempoten.
+        """
+        ops = []
+        for coll, entries in collections.items():
+            entries = [e for e in entries if e.get("id")]
+            for i in range(0, len(entries), BOOTSTRAP_ENTRIES):
+                chunk = entries[i:i + BOOTSTRAP_ENTRIES]
+                digest = hashlib.sha1("".join(e["id"] for e in chunk).encode("ascii")).hexdigest()
+                ops.append({"op_id": f"bootstrap-{coll}-{digest}", "kind": "bootstrap",
+                            "label": f"Data awal {coll}", "ts": "",
+                            "changes": [journal.add(coll, chunk)]})
+        size = os.path.getsize(self.journal_path) if os.path.exists(self.journal_path) else 0
+        self.bootstrap = (ops, size)
+
+    def push_bootstrap(self):
+        ops, size = self.bootstrap
+        for i in range(0, len(ops), BOOTSTRAP_BATCH):
+            self.request("POST", "/push", {"client": self.state["client_id"], "ops": ops[i:i + BOOTSTRAP_BATCH]})
+        if self.state["offset"] == 0:
+            # belum pernah push: journal sampai saat data awal diambil sudah tercakup di dalamnya
+            self.state["offset"] = size
+        self.state["bootstrapped"] = True
+        self.save_state()
+        self.bootstrap = None
+        return len(ops)
+
+    def push(self):
+        pushed = self.push_bootstrap() if self.bootstrap is not None else 0
+        offset = self.state["offset"]
+        size = os.path.getsize(self.journal_path) if os.path.exists(self.journal_path) else 0
+        if offset > size:
+            offset = 0  # journal dibuat ulang; op_id yang sudah terkirim diabaikan server
+        records, offset = read_journal(self.journal_path, offset)
+        ops = [{"op_id": r["op_id"], "kind": r.get("kind", r["type"]), "label": r.get("label", ""),
+                "ts": r.get("ts", ""), "changes": r["changes"]}
+               for r in records if r.get("op_id") and r.get("changes")]
+        for i in range(0, len(ops), BATCH):
+            self.request("POST", "/push", {"client": self.state["client_id"], "ops": ops[i:i + BATCH]})
+        self.state["offset"] = offset
+        self.save_state()
+        return pushed + len(ops)
+
+    def shift_offset(self, cut):
+        # journal dipadatkan (cut byte awal dibuang); disimpan sebelum journal diganti, jadi jika
+        # proses terhenti di antaranya paling-paling operasi dikirim ulang (server idempoten)
+        self.state["offset"] = max(self.state["offset"] - cut, 0)
+        self.save_state()
+
+    def pull(self):
+        """Ambil semua operasi baru; kembalikan (ops, server_seq). Panggil mark_pulled setelah diterapkan."""
+        ops = []
+        since = self.state["pulled"]
+        while True:
+            query = urlencode({"since": since, "limit": BATCH, "client": self.state["client_id"]})
+            resp = self.request("GET", f"/pull?{query}")
+            ops.extend(resp["ops"])
+            since = resp["next"]
+            if not resp["more"]:
+                return ops, since
+
+    def mark_pulled(self, server_seq):
+        self.state["pulled"] = server_seq
+        self.save_state()
+
+    def run(self):
+        pushed = self.push()
+        ops, server_seq = self.pull()
+        return pushed, ops, server_seq
+
+
+def sync_once(client, log):
+    """Satu putaran sync tanpa Qt (dipakai selftest): data awal, push, pull, terapkan."""
+    if client.needs_bootstrap:
+        client.prepare_bootstrap(log.collections)
+    pushed, ops, server_seq = client.run()
+    log.apply_remote(ops)
+    client.mark_pulled(server_seq)
+    return pushed, len(ops)
+
+
+def selftest():
+    """Server sync di localhost (port acak) + dua PC di folder sementara; cek isi histori sama."""
+    tmp = tempfile.mkdtemp(prefix="mt_sync_")
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(asyncio.start_server(SyncServer(os.path.join(tmp, "server")).handle, "127.0.0.1", 0))
+    url = f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+
+    def pc(name, existing):
+        folder = os.path.join(tmp, name)
+        os.makedirs(folder)
+        collections = {"mat": list(existing), "ont": [], "stock": []}
+        log = journal.CommandLog(os.path.join(folder, "journal.jsonl"), collections, lambda coll: None,
+                                 auto_compact=False)
+        return log, SyncClient(url, log.path, os.path.join(folder, "sync_state.json"))
+
+    def mat(desc, qty):
+        return {"tanggal": "2025-01-01 08:00:00", "deskripsi": desc, "qty": qty, "tim": "Tim A", "divisi": "CKT"}
+
+    try:
+        # PC A sudah punya histori sebelum journal/sync dipakai -> harus sampai ke PC B lewat data awal;
+        # entri lama yang sama juga disalin manual ke PC B -> tidak boleh jadi dobel
+        log_a, client_a = pc("pc_a", [mat("Kabel Lama", 5), mat("Kabel Lama", 5)])
+        log_b, client_b = pc("pc_b", [mat("Kabel Lama", 5)])
+        log_a.execute("submit", "A1", [journal.add("mat", [mat("Kabel A", 1)])])
+        log_b.execute("submit", "B1", [journal.add("ont", [{"tanggal": "2025-01-01 09:00:00", "sn": "SN-B1"}])])
+        log_b.execute("submit", "B2", [journal.add("mat", [mat("Kabel B", 2)])])
+        log_b.execute("delete", "B2 hapus", [journal.remove("mat", 1, log_b.collections["mat"][1])])
+        for _ in range(2):
+            for log, client in ((log_a, client_a), (log_b, client_b)):
+                sync_once(client, log)
+        # sync ulang tanpa perubahan tidak boleh menggandakan apa pun
+        sync_once(client_a, log_a)
+        ok = True
+        for coll in log_a.collections:
+            ids_a = sorted(e["id"] for e in log_a.collections[coll])
+            ids_b = sorted(e["id"] for e in log_b.collections[coll])
+            same = ids_a == ids_b and len(ids_a) == len(set(ids_a))
+            ok = ok and same
+            print(f"{coll:<6} PC A {len(ids_a)} entri, PC B {len(ids_b)} entri: {'OK' if same else 'BEDA'}")
+        names = sorted(e["deskripsi"] for e in log_b.collections["mat"])
+        expected = ["Kabel A", "Kabel Lama", "Kabel Lama"]
+        ok = ok and names == expected
+        print(f"material di PC B: {names} ({'OK' if names == expected else 'seharusnya ' + str(expected)})")
+        print("Selftest sync " + ("berhasil" if ok else "GAGAL"))
+        return 0 if ok else 1
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Server sinkronisasi Material Tracker")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve = sub.add_parser("serve", help="jalankan server sync")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve.add_argument("--data", default=os.path.join(os.path.expanduser("~"), ".material_tracker_sync"))
+    sub.add_parser("selftest", help="uji server + dua client di localhost")
+    args = parser.parse_args()
+    if args.command == "selftest":
+        sys.exit(selftest())
+    try:
+        asyncio.run(SyncServer(args.data).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()